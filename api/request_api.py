@@ -7,6 +7,8 @@ from core_lib.api.api_base import APIBase
 from core_lib.utils.common_utils import clean_split
 from core.controller.request_controller import RequestController
 from core.model.request import Request
+from core.utils.bulk_executor import BulkExecutor
+from core.utils.run_ranges import RunRanges
 
 
 request_controller = RequestController()
@@ -30,7 +32,9 @@ class CreateRequestAPI(APIBase):
         data = flask.request.data
         request_json = json.loads(data.decode('utf-8'))
         obj = request_controller.create(request_json)
-        return self.output_text({'response': obj.get_json(), 'success': True, 'message': ''})
+        return self.output_text({'response': obj.get_json(copy=False),
+                                 'success': True,
+                                 'message': ''})
 
 
 class DeleteRequestAPI(APIBase):
@@ -105,8 +109,14 @@ class GetRequestAPI(APIBase):
         Get a single request with given prepid
         """
         args = flask.request.args
-        obj = request_controller.get(prepid, args.get('deleted', '').lower() == 'true')
-        return self.output_text({'response': obj.get_json(), 'success': True, 'message': ''})
+        obj = request_controller.get(prepid,
+                                     args.get('deleted', '').lower() == 'true',
+                                     read_only=True)
+        obj_json = obj.get_json(copy=False)
+        if args.get('runs_format') == 'ranges':
+            obj_json['runs'] = obj.get_run_ranges()
+
+        return self.output_text({'response': obj_json, 'success': True, 'message': ''})
 
 
 class GetEditableRequestAPI(APIBase):
@@ -128,17 +138,17 @@ class GetEditableRequestAPI(APIBase):
                 # Return one object if there is only one prepid
                 request = request_controller.get(prepid[0])
                 editing_info = request_controller.get_editing_info(request)
-                request = request.get_json()
+                request = request.get_json(copy=False)
             else:
                 # Return a list if there are multiple prepids
                 request = [request_controller.get(p) for p in prepid]
                 editing_info = [request_controller.get_editing_info(r) for r in request]
-                request = [r.get_json() for r in request]
+                request = [r.get_json(copy=False) for r in request]
 
         else:
             request = Request()
             editing_info = request_controller.get_editing_info(request)
-            request = request.get_json()
+            request = request.get_json(copy=False)
 
         return self.output_text({'response': {'object': request,
                                               'editing_info': editing_info},
@@ -224,15 +234,14 @@ class RequestNextStatus(APIBase):
             prepid = request_json.get('prepid')
             request = request_controller.get(prepid)
             results = request_controller.next_status(request)
-            results = results.get_json()
+            results = results.get_json(copy=False)
         elif isinstance(request_json, list):
-            results = []
-            for single_request_json in request_json:
-                prepid = single_request_json.get('prepid')
-                request = request_controller.get(prepid)
-                results.append(request_controller.next_status(request))
-
-            results = [x.get_json() for x in results]
+            prepids = [x.get('prepid') for x in request_json]
+            bulk_executor = BulkExecutor(wrap=flask.copy_current_request_context)
+            results = bulk_executor.run(
+                lambda p: request_controller.next_status(request_controller.get(p)),
+                prepids)
+            return self.output_text(BulkExecutor.get_output(results))
         else:
             raise ValueError('Expected a single request dict or a list of request dicts')
 
@@ -260,7 +269,7 @@ class RequestPreviousStatus(APIBase):
             prepid = request_json.get('prepid')
             request = request_controller.get(prepid)
             results = request_controller.previous_status(request)
-            results = results.get_json()
+            results = results.get_json(copy=False)
         elif isinstance(request_json, list):
             results = []
             for single_request_json in request_json:
@@ -268,7 +277,7 @@ class RequestPreviousStatus(APIBase):
                 request = request_controller.get(prepid)
                 results.append(request_controller.previous_status(request))
 
-            results = [x.get_json() for x in results]
+            results = [x.get_json(copy=False) for x in results]
         else:
             raise ValueError('Expected a single request dict or a list of request dicts')
 
@@ -291,6 +300,9 @@ class GetRequestRunsAPI(APIBase):
         """
         request = request_controller.get(prepid)
         result = request_controller.get_runs_for_request(request)
+        if flask.request.args.get('runs_format') == 'ranges':
+            result = RunRanges.compress(result)
+
         return self.output_text({'response': result, 'success': True, 'message': ''})
 
     @APIBase.ensure_request_data
@@ -323,7 +335,7 @@ class GetRequestLumisectionsAPI(APIBase):
         Get a dictionary of runs and lumisection ranges for request's runs
         """
         request = request_controller.get(prepid)
-        result = request_controller.get_lumisections_for_request(request)
+        result = request_controller.get_lumisections_for_request(request).to_json()
         return self.output_text({'response': result, 'success': True, 'message': ''})
 
     @APIBase.ensure_request_data
@@ -337,7 +349,7 @@ class GetRequestLumisectionsAPI(APIBase):
         data_json = json.loads(data.decode('utf-8'))
         runs = data_json['runs']
         subcampaign_name = data_json['subcampaign']
-        result = request_controller.get_lumisections(subcampaign_name, runs)
+        result = request_controller.get_lumisections(subcampaign_name, runs).to_json()
         return self.output_text({'response': result, 'success': True, 'message': ''})
 
 
@@ -360,21 +372,23 @@ class UpdateRequestWorkflowsAPI(APIBase):
         request_json = json.loads(data.decode('utf-8'))
         if isinstance(request_json, dict):
             prepid = request_json.get('prepid')
-            request = request_controller.get(prepid)
-            results = request_controller.update_workflows(request)
-            results = results.get_json()
+            request, updated = request_controller.refresh_workflows(prepid)
+            output = {'response': request.get_json(copy=False),
+                      'success': True,
+                      'message': '',
+                      'updated': int(updated),
+                      'skipped': int(not updated)}
         elif isinstance(request_json, list):
-            results = []
-            for single_request_json in request_json:
-                prepid = single_request_json.get('prepid')
-                request = request_controller.get(prepid)
-                results.append(request_controller.update_workflows(request))
-
-            results = [x.get_json() for x in results]
+            prepids = [x.get('prepid') for x in request_json]
+            bulk_executor = BulkExecutor(wrap=flask.copy_current_request_context)
+            results = request_controller.update_workflows_many(prepids, bulk_executor)
+            output = BulkExecutor.get_output(results)
+            output['updated'] = len([r for r in results if r.get('updated')])
+            output['skipped'] = len([r for r in results if r['success'] and not r['updated']])
         else:
             raise ValueError('Expected a single request dict or a list of request dicts')
 
-        return self.output_text({'response': results, 'success': True, 'message': ''})
+        return self.output_text(output)
 
 
 class RequestOptionResetAPI(APIBase):
@@ -394,14 +408,12 @@ class RequestOptionResetAPI(APIBase):
         if isinstance(request_json, dict):
             prepid = request_json.get('prepid')
             results = request_controller.option_reset(prepid)
-            results = results.get_json()
+            results = results.get_json(copy=False)
         elif isinstance(request_json, list):
-            results = []
-            for single_request_json in request_json:
-                prepid = single_request_json.get('prepid')
-                results.append(request_controller.option_reset(prepid))
-
-            results = [x.get_json() for x in results]
+            prepids = [x.get('prepid') for x in request_json]
+            bulk_executor = BulkExecutor(wrap=flask.copy_current_request_context)
+            results = bulk_executor.run(request_controller.option_reset, prepids)
+            return self.output_text(BulkExecutor.get_output(results))
         else:
             raise ValueError('Expected a single request dict or a list of request dicts')
 
@@ -1,14 +1,27 @@
 """
 Module that contains all search APIs
 """
+import io
 import re
-import time
+import csv
+import json
+import base64
+from functools import partial
 import flask
+from bson import json_util
 from core_lib.api.api_base import APIBase
 from core_lib.database.database import Database
 from core.model.subcampaign import Subcampaign
 from core.model.ticket import Ticket
 from core.model.request import Request
+from core.utils.lru_cache import LRUCache
+from core.utils.object_changes import ObjectChanges
+from core.utils.prepid_index import PrepidIndex
+from core.utils.query_builder import QueryBuilder
+from core.utils.run_ranges import RunRanges
+from core.utils.search_executor import SearchExecutor
+from core.utils.search_terms import SearchTerms
+from core.utils.trigram_index import TrigramIndex
 
 
 class SearchAPI(APIBase):
@@ -16,6 +29,11 @@ class SearchAPI(APIBase):
     Endpoint that is used for search in the database
     """
 
+    # Total row counts of recent queries
+    count_cache = LRUCache(max_size=1000, timeout=60)
+    # Estimated count does not count further than this
+    estimate_limit = 10000
+
     def __init__(self):
         APIBase.__init__(self)
         self.classes = {'subcampaigns': Subcampaign,
@@ -36,38 +54,305 @@ class SearchAPI(APIBase):
         limit = int(args.pop('limit', 20))
         sort = args.pop('sort', None)
         sort_asc = args.pop('sort_asc', 'true').lower() == 'true'
+        fields = args.pop('fields', None)
+        cursor = args.pop('cursor', None)
+        count_mode = args.pop('count', 'exact').lower()
+        if count_mode not in ('exact', 'estimate', 'none'):
+            raise ValueError('Count must be one of exact, estimate or none')
+
+        runs_format = args.pop('runs_format', 'list').lower()
+
+        # Normalized query and collection version are used as count cache key
+        count_key = (db_name,
+                     ObjectChanges.get_version(db_name),
+                     '&&'.join(sorted('%s=%s' % (pair) for pair in args.items())))
+
+        limit = max(1, min(limit, 500))
+        query_builder, query = self.build_query(db_name, args)
+        sort_keys = query_builder.build_sort(sort, sort_asc)
+        projection = self.get_projection(db_name, fields)
+        if projection:
+            # Sort values are needed for the next cursor
+            projection.update({key.split('.')[0]: 1 for key, _ in sort_keys})
+
+        collection = Database(db_name).collection
+        total_rows, total_rows_exact = self.get_total_rows(collection,
+                                                           query,
+                                                           count_key,
+                                                           count_mode)
+        # Keyset pagination works only with scalar sort keys, because lists
+        # are sorted by their smallest or largest element
+        seekable = not any(query_builder.is_multikey(key) for key, _ in sort_keys)
+        cursor_values = self.decode_cursor(cursor, sort_keys, count_key[2]) if seekable else None
+        if cursor_values is not None:
+            # Seek after the last object of the previous page instead of skipping
+            query['$and'].append(query_builder.build_seek(sort_keys, cursor_values))
+            results = collection.find(query, projection).sort(sort_keys).limit(limit)
+        else:
+            results = collection.find(query, projection).sort(sort_keys)
+            results = results.skip(page * limit).limit(limit)
+
+        results = list(results)
+        next_cursor = None
+        if seekable and len(results) == limit:
+            next_cursor = self.encode_cursor(results[-1], sort_keys, count_key[2])
+
+        if runs_format == 'ranges':
+            for result in results:
+                if isinstance(result.get('runs'), list):
+                    result['runs'] = RunRanges.compress(result['runs'])
+
+        return self.output_text({'response': {'results': results,
+                                              'total_rows': total_rows,
+                                              'total_rows_exact': total_rows_exact,
+                                              'next_cursor': next_cursor},
+                                 'success': True,
+                                 'message': ''})
+
+    def build_query(self, db_name, args):
+        """
+        Return a query builder and MongoDB filter for given search arguments
+        """
+        if db_name not in self.classes:
+            raise ValueError(f'Bad db_name "{db_name}"')
 
         # Special cases
         from_ticket = args.pop('ticket', None)
+        prepid_query = None
         if db_name == 'requests' and from_ticket:
-            ticket_database = Database('tickets')
-            tickets = ticket_database.query(query_string=f'prepid={from_ticket}',
-                                            limit=100,
-                                            ignore_case=True)
-            created_requests = []
-            for ticket in tickets:
-                created_requests.extend(ticket['created_requests'])
-
-            created_requests = ','.join(created_requests)
-            prepid_query = args.pop('prepid', '')
-            args['prepid'] = ('%s,%s' % (prepid_query, created_requests)).strip(',')
+            prepid_query = args.pop('prepid', None)
 
-        limit = max(1, min(limit, 500))
         query_string = '&&'.join(['%s=%s' % (pair) for pair in args.items()])
-        database = Database(db_name)
-        query_string = database.build_query_with_types(query_string, self.classes[db_name])
-        results, total_rows = database.query_with_total_rows(query_string=query_string,
-                                                             page=page,
-                                                             limit=limit,
-                                                             sort_attr=sort,
-                                                             sort_asc=sort_asc,
-                                                             ignore_case=True)
+        query_builder = QueryBuilder(db_name, self.classes[db_name])
+        query = query_builder.build(query_string, ignore_case=True)
+        if db_name == 'requests' and from_ticket:
+            query['$and'].append(self.build_ticket_filter(query_builder,
+                                                          from_ticket,
+                                                          prepid_query))
+        candidate_prepids = self.get_candidate_prepids(db_name, args)
+        if candidate_prepids is not None:
+            self.logger.debug('Narrowed %s query down to %s candidates',
+                              db_name,
+                              len(candidate_prepids))
+            query['$and'].append({'prepid': {'$in': sorted(candidate_prepids)}})
+
+        return query_builder, query
+
+    def build_ticket_filter(self, query_builder, from_ticket, prepid_query):
+        """
+        Return a filter of requests that were created by given tickets
+        Requests that match the prepid query are included too
+        """
+        ticket_query = QueryBuilder('tickets', Ticket).build(f'prepid={from_ticket}')
+        tickets = Database('tickets').collection.find(ticket_query,
+                                                      {'created_requests': 1})
+        created_requests = set()
+        for ticket in tickets.limit(100):
+            created_requests.update(ticket.get('created_requests', []))
+
+        self.logger.debug('Found %s requests of tickets %s', len(created_requests), from_ticket)
+        # Exact match on indexed prepid instead of many alternatives in a regex
+        ticket_filter = {'prepid': {'$in': sorted(created_requests)}}
+        if not prepid_query:
+            return ticket_filter
+
+        return {'$or': [query_builder.build_part('prepid', prepid_query), ticket_filter]}
+
+    def get_total_rows(self, collection, query, count_key, count_mode):
+        """
+        Return number of objects that match the query and whether it is exact
+        Exact counts are cached for a short time
+        """
+        if count_mode == 'none':
+            return None, False
 
+        total_rows = self.count_cache.get(count_key)
+        if total_rows is not None:
+            return total_rows, True
 
-        return self.output_text({'response': {'results': results,
-                                              'total_rows': total_rows},
-                                 'success': True,
-                                 'message': ''})
+        if count_mode == 'estimate':
+            if not count_key[2]:
+                return collection.estimated_document_count(), False
+
+            total_rows = collection.count_documents(query, limit=self.estimate_limit)
+            if total_rows >= self.estimate_limit:
+                return total_rows, False
+
+        else:
+            total_rows = collection.count_documents(query)
+
+        self.count_cache.set(count_key, total_rows)
+        return total_rows, True
+
+    @staticmethod
+    def encode_cursor(last_object, sort_keys, query_string):
+        """
+        Return an opaque cursor that points after the given object
+        """
+        values = [QueryBuilder.get_value(last_object, key) for key, _ in sort_keys]
+        cursor = json_util.dumps({'sort': sort_keys, 'query': query_string, 'values': values})
+        return base64.urlsafe_b64encode(cursor.encode('utf-8')).decode('utf-8')
+
+    @staticmethod
+    def decode_cursor(cursor, sort_keys, query_string):
+        """
+        Return sort values stored in the cursor
+        Return None if there is no cursor or it was made for a different sort
+        or query
+        """
+        if not cursor:
+            return None
+
+        try:
+            cursor = json_util.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')))
+        except ValueError as ex:
+            raise ValueError('Bad cursor') from ex
+
+        if [tuple(x) for x in cursor.get('sort', [])] != sort_keys:
+            return None
+
+        if cursor.get('query') != query_string:
+            return None
+
+        return cursor.get('values')
+
+    def get_projection(self, db_name, fields):
+        """
+        Return a MongoDB projection for comma separated list of top level
+        attributes or None if all attributes should be returned
+        Prepid is always included
+        """
+        if not fields:
+            return None
+
+        schema = self.classes[db_name].schema()
+        fields = {x.strip() for x in fields.split(',') if x.strip()}
+        unknown_fields = fields - set(schema.keys())
+        if unknown_fields:
+            raise ValueError(f'Unknown {db_name} fields: {", ".join(sorted(unknown_fields))}')
+
+        fields.add('prepid')
+        return {field: 1 for field in sorted(fields)}
+
+    def get_candidate_prepids(self, db_name, args):
+        """
+        Use lowercase search terms for "starts with" queries and trigram index
+        for other wildcard queries to get a set of prepids that might match
+        Return None if neither can be used
+        """
+        search_terms = SearchTerms()
+        trigram_index = TrigramIndex.get_index(db_name)
+        candidate_prepids = None
+        for attribute, value in args.items():
+            prepids = search_terms.find_prepids_by_prefix(db_name,
+                                                          attribute,
+                                                          value,
+                                                          TrigramIndex.max_candidates)
+            if prepids is None and trigram_index:
+                prepids = trigram_index.find_prepids(attribute, value)
+
+            if prepids is None:
+                continue
+
+            if candidate_prepids is None:
+                candidate_prepids = prepids
+            else:
+                candidate_prepids &= prepids
+
+        return candidate_prepids
+
+
+class SearchExportAPI(SearchAPI):
+    """
+    Endpoint that is used to export all search results as NDJSON or CSV
+    """
+
+    def __init__(self):
+        SearchAPI.__init__(self)
+
+    @APIBase.exceptions_to_errors
+    def get(self):
+        """
+        Stream all objects that match the search as NDJSON (default) or CSV
+        Use format=ndjson|csv and fields=<comma separated attributes>
+        """
+        args = flask.request.args.to_dict()
+        if args is None:
+            args = {}
+
+        db_name = args.pop('db_name', None)
+        sort = args.pop('sort', None)
+        sort_asc = args.pop('sort_asc', 'true').lower() == 'true'
+        fields = args.pop('fields', None)
+        output_format = args.pop('format', 'ndjson').lower()
+        if output_format not in ('ndjson', 'csv'):
+            raise ValueError('Format must be either ndjson or csv')
+
+        # Paging parameters do not make sense for export
+        for attribute in ('page', 'limit', 'cursor', 'count', 'runs_format'):
+            args.pop(attribute, None)
+
+        query_builder, query = self.build_query(db_name, args)
+        sort_keys = query_builder.build_sort(sort, sort_asc)
+        projection = self.get_projection(db_name, fields)
+        collection = Database(db_name).collection
+        results = collection.find(query, projection).sort(sort_keys).batch_size(500)
+        if output_format == 'csv':
+            if projection:
+                columns = [x for x in projection if x != '_id']
+            else:
+                columns = sorted(x for x in self.classes[db_name].schema() if x != '_id')
+
+            generator = self.generate_csv(results, columns)
+            content_type = 'text/csv'
+        else:
+            generator = self.generate_ndjson(results)
+            content_type = 'application/x-ndjson'
+
+        headers = {'Content-Disposition': f'attachment; filename={db_name}.{output_format}'}
+        return flask.Response(flask.stream_with_context(generator),
+                              content_type=content_type,
+                              headers=headers)
+
+    @staticmethod
+    def generate_ndjson(results):
+        """
+        Yield one JSON line per object
+        """
+        try:
+            for result in results:
+                yield json.dumps(result, default=str, sort_keys=True) + '\n'
+        finally:
+            results.close()
+
+    @staticmethod
+    def generate_csv(results, columns):
+        """
+        Yield CSV header and one line per object
+        Lists and dictionaries are written as JSON
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        try:
+            for result in results:
+                row = []
+                for column in columns:
+                    value = result.get(column, '')
+                    if isinstance(value, (list, dict)):
+                        value = json.dumps(value, default=str, sort_keys=True)
+
+                    row.append(value)
+
+                writer.writerow(row)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        finally:
+            results.close()
 
 
 class SuggestionsAPI(APIBase):
@@ -88,16 +373,21 @@ class SuggestionsAPI(APIBase):
             args = {}
 
         db_name = args.pop('db_name', None)
-        query = args.pop('query', None).replace(' ', '.*')
-        limit = max(1, min(50, args.pop('limit', 20)))
+        query = args.pop('query', None)
+        limit = max(1, min(50, int(args.pop('limit', 20))))
 
-        if not db_name or not query:
+        if db_name not in ('subcampaigns', 'tickets', 'requests') or not query:
             raise ValueError('Bad db_name or query parameter')
 
-        database = Database(db_name)
-        db_query = {'prepid': re.compile(f'.*{query}.*', re.IGNORECASE)}
-        results = database.collection.find(db_query).limit(limit)
-        results = [x['prepid'] for x in results]
+        prepid_index = PrepidIndex.get_index(db_name)
+        if prepid_index.loaded:
+            results = prepid_index.suggest(query, limit)
+        else:
+            # Index is still being loaded
+            fragments = [re.escape(x) for x in re.split('[ *]+', query) if x]
+            db_query = {'prepid': re.compile('.*'.join(fragments), re.IGNORECASE)}
+            results = Database(db_name).collection.find(db_query, {'prepid': 1}).limit(limit)
+            results = [x['prepid'] for x in results]
 
         return self.output_text({'response': results,
                                  'success': True,
@@ -109,11 +399,37 @@ class WildSearchAPI(APIBase):
     Endpoint that is used for abstract search in the whole database
     """
 
+    # Responses of recent searches
+    # Cache is per process, changes made by other processes are seen only
+    # after entries expire, so timeout is kept short
+    result_cache = LRUCache(max_size=500, timeout=60)
+    # Run numbers and ranges, e.g. 355100..356000,356100
+    runs_query = re.compile(r'^\d*(\.\.\d*)?(,\d*(\.\.\d*)?)*$')
+
     def __init__(self):
         APIBase.__init__(self)
-        self.classes = {'subcampaigns': Subcampaign,
-                        'requests': Request,
-                        'tickets': Ticket}
+
+    @classmethod
+    def invalidate_cache(cls, database_name, obj_json, _prepid):
+        """
+        Remove cached searches that might be affected by a change of an object
+        in this process: searches that have results from the same database,
+        because they might point to old values of the object, and searches
+        that match any of it's new values
+        """
+        cls.result_cache.remove_if(
+            lambda _, results: any(r['database'] == database_name for r in results))
+        if obj_json is None:
+            return
+
+        if database_name == 'requests':
+            cls.result_cache.remove_if(lambda query, _: cls.runs_query.match(query))
+
+        values = [value.lower() for _, value in SearchTerms.extract_terms(database_name,
+                                                                          obj_json)]
+        cls.result_cache.remove_if(
+            lambda query, _: any(SearchTerms.build_matcher(f'*{query}*').match(value)
+                                 for value in values))
 
     @APIBase.exceptions_to_errors
     def get(self):
@@ -136,105 +452,104 @@ class WildSearchAPI(APIBase):
                                      'success': True,
                                      'message': 'Query string too short'})
 
-        subcampaigns_db = Database('subcampaigns')
-        tickets_db = Database('tickets')
-        requests_db = Database('requests')
-
-        attempts = [('requests', requests_db, 'prepid', False),
-                    ('tickets', tickets_db, 'prepid', False),
-                    ('subcampaigns', subcampaigns_db, 'prepid', False),
-                    ('requests', requests_db, 'prepid', True),
-                    ('tickets', tickets_db, 'prepid', True),
-                    ('subcampaigns', subcampaigns_db, 'prepid', True),
+        attempts = [('requests', 'prepid', False),
+                    ('tickets', 'prepid', False),
+                    ('subcampaigns', 'prepid', False),
+                    ('requests', 'prepid', True),
+                    ('tickets', 'prepid', True),
+                    ('subcampaigns', 'prepid', True),
                     # Tickets
-                    ('tickets', tickets_db, 'subcampaign', True),
-                    ('tickets', tickets_db, 'processing_string', True),
-                    ('tickets', tickets_db, 'input', True),
+                    ('tickets', 'subcampaign', True),
+                    ('tickets', 'processing_string', True),
+                    ('tickets', 'input', True),
                     # Requests
-                    ('requests', requests_db, 'subcampaign', True),
-                    ('requests', requests_db, 'processing_string', True),
-                    ('requests', requests_db, 'input_dataset', True),
-                    ('requests', requests_db, 'output_dataset', True),
-                    ('requests', requests_db, 'workflow', True),]
-
-        results = []
-        used_values = set()
-        for attempt in attempts:
-            db_name = attempt[0]
-            database = attempt[1]
-            attr = attempt[2]
-            wrap_in_wildcards = attempt[3]
+                    ('requests', 'subcampaign', True),
+                    ('requests', 'processing_string', True),
+                    ('requests', 'input_dataset', True),
+                    ('requests', 'output_dataset', True),
+                    ('requests', 'workflow', True),]
+
+        # Search is case insensitive
+        cache_key = query.lower()
+        cached_results = self.result_cache.get(cache_key)
+        if cached_results is not None:
+            return self.output_text({'response': cached_results,
+                                     'timings': [],
+                                     'success': True,
+                                     'message': ''})
+
+        search_terms = SearchTerms()
+        executor_attempts = []
+        for db_name, attr, wrap_in_wildcards in attempts:
             if wrap_in_wildcards:
                 wrapped_query = f'*{query}*'
             else:
                 wrapped_query = f'{query}'
 
-            self.logger.info('Trying to query %s in %s', wrapped_query, db_name)
-            typed_query = database.build_query_with_types(f'{attr}={wrapped_query}',
-                                                          self.classes[db_name])
-            query_results = database.query(typed_query, 0, 5, ignore_case=True)
-            for result in query_results:
-                values = self.extract_values(result, attr, wrapped_query, db_name)
-                for value in values:
-                    key = f'{db_name}:{attr}:{value}'
-                    if key not in used_values:
-                        used_values.add(key)
-                        results.append({'value': value,
-                                        'attribute': attr,
-                                        'database': db_name})
-
-            # Limit results to 20 to save DB some queries
-            if len(results) >= 20:
-                results = results[:20]
-                break
-
-            # Limit DB query rate as this is very expensive
-            time.sleep(0.075)
+            attempt_name = f'{db_name}:{attr}:{wrapped_query}'
+            executor_attempts.append((attempt_name,
+                                      partial(self.run_attempt,
+                                              search_terms,
+                                              db_name,
+                                              attr,
+                                              wrapped_query)))
+
+        if self.runs_query.match(query) and any(c.isdigit() for c in query):
+            executor_attempts.insert(0, (f'requests:runs:{query}',
+                                         partial(self.run_runs_attempt, query)))
 
+        results, timings = SearchExecutor(result_limit=20).run(executor_attempts)
+        self.result_cache.set(cache_key, results)
         return self.output_text({'response': results,
+                                 'timings': timings,
                                  'success': True,
                                  'message': ''})
 
-    def extract_values(self, item, attribute, query, db_name):
-        """
-        Return a list of one or multiple values got from an object
-        One object might have multiple values, e.g. output datasets
-        """
-        if attribute in item and attribute != 'input':
-            return [item[attribute]]
-
-        values = []
-        matcher = re.compile(query.replace('*', '.*'), re.IGNORECASE)
-        self.logger.info('Item: %s, attribute: %s, query: %s, db name: %s',
-                         item['prepid'],
-                         attribute,
-                         query,
-                         db_name)
-        if db_name == 'tickets':
-            if attribute in ('subcampaign', 'processing_string'):
-                for step in item['steps']:
-                    if matcher.fullmatch(step[attribute]):
-                        values.append(step[attribute])
-            elif attribute == 'input':
-                for input_item in item['input']:
-                    if matcher.fullmatch(input_item):
-                        values.append(input_item)
-
-        elif db_name == 'requests':
-            if attribute == 'input_dataset':
-                values.append(item['input']['dataset'])
-
-            elif attribute == 'input_request':
-                values.append(item['input']['request'])
-
-            elif attribute == 'output_dataset':
-                for dataset in item['output_datasets']:
-                    if matcher.fullmatch(dataset):
-                        values.append(dataset)
-
-            elif attribute == 'workflow':
-                for workflow in item['workflows']:
-                    if matcher.fullmatch(workflow['name']):
-                        values.append(workflow['name'])
-
-        return values
+    def run_attempt(self, search_terms, db_name, attr, wrapped_query):
+        """
+        Look up values of a single attribute in search terms collection
+        Queries that start with a wildcard are looked up in prepid or trigram
+        index, they are skipped if index cannot be used
+        Return a list of (key, result) pairs
+        """
+        self.logger.info('Trying to query %s in %s', wrapped_query, db_name)
+        if not wrapped_query.startswith('*'):
+            values = search_terms.search(db_name, attr, wrapped_query, limit=5)
+        elif attr == 'prepid':
+            prepid_index = PrepidIndex.get_index(db_name)
+            values = prepid_index.suggest(wrapped_query, 5) if prepid_index.loaded else []
+        else:
+            trigram_index = TrigramIndex.get_index(db_name)
+            values_lower = trigram_index and trigram_index.find_values(attr, wrapped_query, 5)
+            if values_lower:
+                values = search_terms.get_values(db_name, attr, values_lower, limit=5)
+            else:
+                values = []
+
+        return [(f'{db_name}:{attr}:{value}',
+                 {'value': value,
+                  'attribute': attr,
+                  'database': db_name})
+                for value in values]
+
+    def run_runs_attempt(self, query):
+        """
+        Check if there are requests with runs in given run numbers or ranges
+        Return a list with a single (key, result) pair or an empty list
+        """
+        try:
+            runs_filter = QueryBuilder('requests', Request).build(f'runs={query}')
+        except ValueError:
+            return []
+
+        if not Database('requests').collection.find_one(runs_filter, {'_id': 1}):
+            return []
+
+        return [(f'requests:runs:{query}',
+                 {'value': query,
+                  'attribute': 'runs',
+                  'database': 'requests'})]
+
+
+ObjectChanges.add_listener(WildSearchAPI.invalidate_cache)
+ObjectChanges.add_listener(TrigramIndex.object_changed)
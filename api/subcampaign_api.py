@@ -29,7 +29,9 @@ class CreateSubcampaignAPI(APIBase):
         data = flask.request.data
         subcampaign_json = json.loads(data.decode('utf-8'))
         obj = subcampaign_controller.create(subcampaign_json)
-        return self.output_text({'response': obj.get_json(), 'success': True, 'message': ''})
+        return self.output_text({'response': obj.get_json(copy=False),
+                                 'success': True,
+                                 'message': ''})
 
 
 class DeleteSubcampaignAPI(APIBase):
@@ -89,7 +91,9 @@ class GetSubcampaignAPI(APIBase):
         """
         args = flask.request.args
         obj = subcampaign_controller.get(prepid, args.get('deleted', '').lower() == 'true')
-        return self.output_text({'response': obj.get_json(), 'success': True, 'message': ''})
+        return self.output_text({'response': obj.get_json(copy=False),
+                                 'success': True,
+                                 'message': ''})
 
 
 class GetEditableSubcampaignAPI(APIBase):
@@ -111,7 +115,7 @@ class GetEditableSubcampaignAPI(APIBase):
             subcampaign = Subcampaign()
 
         editing_info = subcampaign_controller.get_editing_info(subcampaign)
-        return self.output_text({'response': {'object': subcampaign.get_json(),
+        return self.output_text({'response': {'object': subcampaign.get_json(copy=False),
                                               'editing_info': editing_info},
                                  'success': True,
                                  'message': ''})
@@ -3,11 +3,15 @@ Module that contains all system APIs
 """
 import time
 import os.path
+import flask
 from core_lib.api.api_base import APIBase
 from core_lib.utils.locker import Locker
 from core_lib.database.database import Database
 from core_lib.utils.user_info import UserInfo
 from core.utils.request_submitter import RequestSubmitter
+from core.utils.query_builder import QueryBuilder
+from core.utils.slow_query_log import SlowQueryLog
+from api.search_api import SearchAPI, WildSearchAPI
 
 
 class SubmissionWorkerStatusAPI(APIBase):
@@ -140,6 +144,58 @@ class ObjectsInfoAPI(APIBase):
                                  'message': ''})
 
 
+class CacheStatsAPI(APIBase):
+    """
+    Endpoint for getting statistics of search caches
+    """
+
+    def __init__(self):
+        APIBase.__init__(self)
+
+    @APIBase.exceptions_to_errors
+    @APIBase.ensure_role('administrator')
+    def get(self):
+        """
+        Get size, hit and miss counters of search caches of this process
+        """
+        stats = {'wild_search': WildSearchAPI.result_cache.get_stats(),
+                 'search_count': SearchAPI.count_cache.get_stats(),
+                 'compiled_queries': QueryBuilder.query_cache.get_stats()}
+        return self.output_text({'response': stats, 'success': True, 'message': ''})
+
+
+class SlowQueriesAPI(APIBase):
+    """
+    Endpoint for getting slow database queries and their explain plans
+    """
+
+    def __init__(self):
+        APIBase.__init__(self)
+
+    @APIBase.exceptions_to_errors
+    @APIBase.ensure_role('administrator')
+    def get(self):
+        """
+        Get most recent slow queries and number and durations of all queries of this process
+        Optional arguments: limit (default 50), collection
+        """
+        args = flask.request.args.to_dict()
+        limit = max(1, min(int(args.get('limit', 50)), 500))
+        query = {}
+        if args.get('collection'):
+            query['collection'] = args['collection']
+
+        collection = Database(SlowQueryLog.collection_name).collection
+        slow_queries = list(collection.find(query, {'_id': 0}).sort('$natural', -1).limit(limit))
+        slow_query_log = SlowQueryLog.get_instance()
+        stats = slow_query_log.get_stats() if slow_query_log else {}
+        return self.output_text({'response': {'slow_queries': slow_queries,
+                                              'threshold_ms': SlowQueryLog.threshold_ms,
+                                              'stats': stats},
+                                 'success': True,
+                                 'message': ''})
+
+
 class BuildInfoAPI(APIBase):
     """
     Endpoint for getting build information if it is available
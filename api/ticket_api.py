@@ -31,7 +31,9 @@ class CreateTicketAPI(APIBase):
         data = flask.request.data
         ticket_json = json.loads(data.decode('utf-8'))
         obj = ticket_controller.create(ticket_json)
-        return self.output_text({'response': obj.get_json(), 'success': True, 'message': ''})
+        return self.output_text({'response': obj.get_json(copy=False),
+                                 'success': True,
+                                 'message': ''})
 
 
 class DeleteTicketAPI(APIBase):
@@ -91,7 +93,9 @@ class GetTicketAPI(APIBase):
         """
         args = flask.request.args
         obj = ticket_controller.get(prepid, args.get('deleted', '').lower() == 'true')
-        return self.output_text({'response': obj.get_json(), 'success': True, 'message': ''})
+        return self.output_text({'response': obj.get_json(copy=False),
+                                 'success': True,
+                                 'message': ''})
 
 
 class GetTicketDatasetsAPI(APIBase):
@@ -159,7 +163,7 @@ class GetEditableTicketAPI(APIBase):
             ticket = Ticket()
 
         editing_info = ticket_controller.get_editing_info(ticket)
-        return self.output_text({'response': {'object': ticket.get_json(),
+        return self.output_text({'response': {'object': ticket.get_json(copy=False),
                                               'editing_info': editing_info},
                                  'success': True,
                                  'message': ''})
@@ -10,15 +10,16 @@ from core_lib.utils.common_utils import (change_workflow_priority,
                                          get_scram_arch,
                                          config_cache_lite_setup,
                                          dbs_datasetlist,
-                                         get_workflows_from_stats,
-                                         get_workflows_from_stats_for_prepid,
                                          refresh_workflows_in_stats, run_commands_in_cmsenv)
 from core_lib.utils.settings import Settings
 from core_lib.controller.controller_base import ControllerBase
 from core.model.request import Request
+from core.model.request_view import RequestView
 from core.model.subcampaign import Subcampaign
 from core.model.ticket import Ticket
 from core.utils.request_submitter import RequestSubmitter
+from core.utils.object_changes import ObjectChanges
+from core.utils.stats_workflows import StatsWorkflows
 from core.controller.subcampaign_controller import SubcampaignController
 
 
@@ -36,6 +37,18 @@ class RequestController(ControllerBase):
         self.database_name = 'requests'
         self.model_class = Request
 
+    def get(self, prepid, deleted=False, read_only=False):
+        """
+        Return a request loaded from database without checking attributes
+        Read only request is not copied and builds sequences lazily, it is
+        meant for paths that only serialize the request
+        """
+        request_json = Database(self.database_name).get(prepid)
+        if not request_json or (request_json.get('deleted') and not deleted):
+            raise ValueError(f'Request "{prepid}" does not exist')
+
+        return Request.from_database(request_json, read_only=read_only)
+
     def create(self, json_data):
         # Get a subcampaign
         subcampaign_db = Database('subcampaigns')
@@ -45,7 +58,7 @@ class RequestController(ControllerBase):
             raise ValueError(f'Subcampaign "{subcampaign_name}" does not exist')
 
         request_db = Database(self.database_name)
-        subcampaign = Subcampaign(json_input=subcampaign_json)
+        subcampaign = Subcampaign.from_database(subcampaign_json)
 
         json_data['cmssw_release'] = subcampaign.get('cmssw_release')
         json_data['subcampaign'] = subcampaign.get_prepid()
@@ -88,11 +101,7 @@ class RequestController(ControllerBase):
             era = input_dataset_parts[1].split('-')[0]
             dataset = input_dataset_parts[0]
         elif not input_dataset and input_request_prepid:
-            input_request_json = request_db.get(input_request_prepid)
-            if not input_request_json:
-                raise ValueError(f'Request "{input_request_prepid}" does not exist')
-
-            input_request = Request(json_input=input_request_json)
+            input_request = RequestView.get(input_request_prepid)
             era = input_request.get_era()
             dataset = input_request.get_dataset()
         else:
@@ -160,7 +169,11 @@ class RequestController(ControllerBase):
 
         return True
 
+    def after_create(self, obj):
+        ObjectChanges.saved(self.database_name, obj.get_json(copy=False))
+
     def after_update(self, old_obj, new_obj, changed_values):
+        ObjectChanges.saved(self.database_name, new_obj.get_json(copy=False))
         if new_obj.get('status') == 'submitted':
             if old_obj.get('priority') != new_obj.get('priority'):
                 self.change_request_priority(new_obj, new_obj.get('priority'))
@@ -170,6 +183,7 @@ class RequestController(ControllerBase):
 
     def after_delete(self, obj):
         prepid = obj.get_prepid()
+        ObjectChanges.deleted(self.database_name, prepid)
         tickets_db = Database('tickets')
         tickets = tickets_db.query(f'created_requests={prepid}')
         self.logger.debug(json.dumps(tickets, indent=2))
@@ -177,14 +191,15 @@ class RequestController(ControllerBase):
             ticket_prepid = ticket_json['prepid']
             with self.locker.get_lock(ticket_prepid):
                 ticket_json = tickets_db.get(ticket_prepid)
-                ticket = Ticket(json_input=ticket_json)
+                ticket = Ticket.from_database(ticket_json)
                 created_requests = ticket.get('created_requests')
                 if prepid in created_requests:
                     created_requests.remove(prepid)
 
                 ticket.set('created_requests', created_requests)
                 ticket.add_history('remove_request', prepid, None)
-                tickets_db.save(ticket.get_json())
+                tickets_db.save(ticket.get_json(copy=False))
+                ObjectChanges.saved('tickets', ticket.get_json(copy=False))
 
         return True
 
@@ -451,12 +466,13 @@ class RequestController(ControllerBase):
             output_datasets = input_request.get('output_datasets')
             new_input_dataset = self.pick_input_dataset(request, input_request)
             should_update = False
+            input_dataset = request.get('input')['dataset']
             if output_datasets and new_input_dataset:
                 request.get('input')['dataset'] = new_input_dataset
-                should_update = True
+                should_update = input_dataset != new_input_dataset
             elif not output_datasets:
                 request.get('input')['dataset'] = ''
-                should_update = True
+                should_update = bool(input_dataset)
 
             if should_update:
                 self.update(request.get_json(), force_update=True)
@@ -501,7 +517,8 @@ class RequestController(ControllerBase):
         request_db = Database(self.database_name)
         request.set('status', status)
         request.add_history('status', status, None, timestamp)
-        request_db.save(request.get_json())
+        request_db.save(request.get_json(copy=False))
+        ObjectChanges.saved(self.database_name, request.get_json(copy=False))
 
     def next_status(self, request):
         """
@@ -585,7 +602,7 @@ class RequestController(ControllerBase):
         Try to move request to done status
         """
         prepid = request.get_prepid()
-        request = self.update_workflows(request)
+        request, _ = self.refresh_workflows(prepid)
         workflows = request.get('workflows')
         workflows = [w for w in workflows if w['type'].lower() != 'resubmission']
         if workflows:
@@ -716,12 +733,10 @@ class RequestController(ControllerBase):
 
     def get_lumisections(self, subcampaign_name, runs):
         """
-        Get lumisection ranges in a subcampaign's dcs json for given runs
+        Get lumi mask of given runs from a subcampaign's dcs json
         """
         subcampaign_controller = SubcampaignController()
-        dcs_json = subcampaign_controller.get_dcs_json(subcampaign_name)
-        runs = {str(r) for r in runs}
-        lumisections = {run: lumis for run, lumis in dcs_json.items() if run in runs}
+        lumisections = subcampaign_controller.get_dcs_mask(subcampaign_name).subset(runs)
         self.logger.debug('Fetched %s runs with lumi ranges for %s and %s runs',
                           len(lumisections),
                           subcampaign_name,
@@ -734,8 +749,8 @@ class RequestController(ControllerBase):
         """
         subcampaign_controller = SubcampaignController()
         dbs_runs = set(self.get_dataset_runs(input_dataset))
-        dcs_json = subcampaign_controller.get_dcs_json(subcampaign_name)
-        dcs_runs = set(int(x) for x in list(dcs_json.keys()))
+        dcs_mask = subcampaign_controller.get_dcs_mask(subcampaign_name)
+        dcs_runs = set(dcs_mask.get_runs())
         if dbs_runs and dcs_runs:
             all_runs = sorted(list(dbs_runs & dcs_runs))
         else:
@@ -759,7 +774,7 @@ class RequestController(ControllerBase):
 
     def get_lumisections_for_request(self, request, runs=None):
         """
-        Return a dictionary of runs and lumisection ranges
+        Return a lumi mask of runs and lumisection ranges
         If no runs are provided, request's runs will be used
         """
         subcampaign_name = request.get('subcampaign')
@@ -780,7 +795,8 @@ class RequestController(ControllerBase):
             new_workflow = {'name': workflow['RequestName'],
                             'type': workflow['RequestType'],
                             'output_datasets': [],
-                            'status_history': []}
+                            'status_history': [],
+                            'revision': StatsWorkflows.get_revision(workflow)}
             for output_dataset in output_datasets:
                 for history_entry in reversed(workflow.get('EventNumberHistory', [])):
                     if output_dataset in history_entry['Datasets']:
@@ -858,84 +874,136 @@ class RequestController(ControllerBase):
                                      sort_keys=True))
         return output_datasets
 
-    def update_workflows(self, request):
+    def update_workflows_many(self, prepids, bulk_executor):
         """
-        Update computing workflows from Stats2
+        Update computing workflows of multiple requests from Stats2
+        Workflows are fetched with a few batched calls and then requests
+        are updated separately in parallel using given bulk executor
+        Return a list of results of each request, results have "updated"
+        set to False if request's workflows did not change
+        Requests whose workflows could not be prefetched fetch them separately
+        """
+        stats_workflows = StatsWorkflows().get_many(prepids)
+        results = bulk_executor.run(lambda p: self.refresh_workflows(p, stats_workflows.get(p)),
+                                    prepids)
+        for result in results:
+            if result['success']:
+                result['response'], result['updated'] = result['response']
+
+        self.logger.info('Updated workflows of %s requests, skipped %s unchanged requests',
+                         len([r for r in results if r.get('updated')]),
+                         len([r for r in results if r['success'] and not r['updated']]))
+        return results
+
+    def refresh_workflows(self, prepid, stats_workflows=None):
+        """
+        Update computing workflows of request with given prepid from Stats2
+        if any of them changed
+        Request is loaded only once, under the lock
+        Workflows that were already fetched from Stats2 can be given as
+        stats_workflows, only workflows that are not in them will be fetched
+        Return updated request and whether it was updated
         """
-        prepid = request.get_prepid()
         request_db = Database('requests')
         with self.locker.get_lock(prepid):
             request_json = request_db.get(prepid)
-            request = Request(json_input=request_json)
-            workflow_names = {w['name'] for w in request.get('workflows')}
-            stats_workflows = get_workflows_from_stats_for_prepid(prepid)
-            workflow_names -= {w['RequestName'] for w in stats_workflows}
-            self.logger.info('%s workflows that are not in stats: %s',
-                             len(workflow_names),
-                             workflow_names)
-            stats_workflows += get_workflows_from_stats(list(workflow_names))
-            all_workflows = {}
-            for workflow in stats_workflows:
-                if not workflow or not workflow.get('RequestName'):
-                    raise RuntimeError('Could not find workflow in Stats2')
-
-                name = workflow.get('RequestName')
-                all_workflows[name] = workflow
-                self.logger.info('Found workflow %s for %s', name, prepid)
-
+            if not request_json or request_json.get('deleted'):
+                raise ValueError(f'Request "{prepid}" does not exist')
+
+            stored_workflows = request_json.get('workflows', [])
+            all_workflows = StatsWorkflows().get_all(prepid,
+                                                     [w['name'] for w in stored_workflows],
+                                                     stats_workflows)
+            # Output datasets depend on request's sequences and datatiers too
+            request = Request.from_database(request_json, read_only=True)
             output_datasets = self.get_output_datasets(request, all_workflows)
-            workflows = self.pick_workflows(all_workflows, output_datasets)
-            newest_workflow = None
-            for workflow in reversed(workflows):
-                workflow_name = workflow['name']
-                if workflow['type'].lower() == 'resubmission':
-                    self.logger.debug('Skipping %s because resubmission', workflow_name)
-                    continue
-
-                status_history = set(x['status'] for x in workflow.get('status_history', []))
-                if DEAD_WORKFLOW_STATUS & status_history:
-                    self.logger.debug('Skipping %s because dead', workflow_name)
-                    continue
-
-                if not newest_workflow:
-                    newest_workflow = all_workflows[workflow_name]
-
-                completed_events = -1
-                for output_dataset in workflow.get('output_datasets', []):
-                    if output_datasets and output_dataset['name'] == output_datasets[-1]:
-                        completed_events = output_dataset['events']
-                        break
+            updated = self.__workflows_changed(request_json, all_workflows, output_datasets)
+            if updated:
+                self.__apply_workflows(request, all_workflows, output_datasets)
+                request_db.save(request.get_json(copy=False))
+                ObjectChanges.saved(self.database_name, request.get_json(copy=False))
+            else:
+                self.logger.info('Workflows of %s did not change, skipping update', prepid)
+
+            if output_datasets:
+                # Requests could have been created after the last update
+                self.__update_input_of_subsequent_requests(prepid)
+
+        return request, updated
 
-                if completed_events != -1:
-                    request.set('completed_events', completed_events)
+    @staticmethod
+    def __workflows_changed(request_json, all_workflows, output_datasets):
+        """
+        Return whether any Stats2 document changed, list of workflows changed
+        or output datasets changed since workflows were stored
+        Everything that is set from workflows depends only on these
+        """
+        if request_json.get('output_datasets') != output_datasets:
+            return True
+
+        stored_revisions = {w['name']: w.get('revision')
+                            for w in request_json.get('workflows', [])}
+        revisions = {n: StatsWorkflows.get_revision(w) for n, w in all_workflows.items()}
+        return stored_revisions != revisions
+
+    def __apply_workflows(self, request, all_workflows, output_datasets):
+        """
+        Set output datasets, workflows, completed and total events and
+        priority of request from Stats2 workflows
+        """
+        prepid = request.get_prepid()
+        workflows = self.pick_workflows(all_workflows, output_datasets)
+        newest_workflow = None
+        for workflow in reversed(workflows):
+            workflow_name = workflow['name']
+            if workflow['type'].lower() == 'resubmission':
+                self.logger.debug('Skipping %s because resubmission', workflow_name)
+                continue
+
+            status_history = set(x['status'] for x in workflow.get('status_history', []))
+            if DEAD_WORKFLOW_STATUS & status_history:
+                self.logger.debug('Skipping %s because dead', workflow_name)
+                continue
+
+            if not newest_workflow:
+                newest_workflow = all_workflows[workflow_name]
+
+            completed_events = -1
+            for output_dataset in workflow.get('output_datasets', []):
+                if output_datasets and output_dataset['name'] == output_datasets[-1]:
+                    completed_events = output_dataset['events']
                     break
 
-            if newest_workflow:
-                if 'RequestPriority' in newest_workflow:
-                    priority = newest_workflow['RequestPriority']
-                    request.set('priority', priority)
-                    self.logger.info('Setting %s priority to %s', prepid, priority)
+            if completed_events != -1:
+                request.set('completed_events', completed_events)
+                break
 
-                if 'TotalEvents' in newest_workflow:
-                    total_events = max(0, newest_workflow['TotalEvents'])
-                    request.set('total_events', total_events)
-                    self.logger.info('Setting %s total events to %s', prepid, total_events)
+        if newest_workflow:
+            if 'RequestPriority' in newest_workflow:
+                priority = newest_workflow['RequestPriority']
+                request.set('priority', priority)
+                self.logger.info('Setting %s priority to %s', prepid, priority)
 
-            request.set('output_datasets', output_datasets)
-            request.set('workflows', workflows)
-            request_db.save(request.get_json())
+            if 'TotalEvents' in newest_workflow:
+                total_events = max(0, newest_workflow['TotalEvents'])
+                request.set('total_events', total_events)
+                self.logger.info('Setting %s total events to %s', prepid, total_events)
 
-            if output_datasets:
-                subsequent_requests = request_db.query(f'input.request={prepid}')
-                self.logger.info('Found %s subsequent requests for %s: %s',
-                                 len(subsequent_requests),
-                                 prepid,
-                                 [r['prepid'] for r in subsequent_requests])
-                for subsequent_request_json in subsequent_requests:
-                    subsequent_request_prepid = subsequent_request_json.get('prepid')
-                    self.update_input_dataset(self.get(subsequent_request_prepid))
+        request.set('output_datasets', output_datasets)
+        request.set('workflows', workflows)
 
-        return request
+    def __update_input_of_subsequent_requests(self, prepid):
+        """
+        Update input datasets of requests that have given request as input
+        """
+        subsequent_requests = Database('requests').query(f'input.request={prepid}')
+        self.logger.info('Found %s subsequent requests for %s: %s',
+                         len(subsequent_requests),
+                         prepid,
+                         [r['prepid'] for r in subsequent_requests])
+        for subsequent_request_json in subsequent_requests:
+            subsequent_request_prepid = subsequent_request_json.get('prepid')
+            self.update_input_dataset(self.get(subsequent_request_prepid))
 
     def option_reset(self, prepid):
         """
@@ -954,13 +1022,14 @@ class RequestController(ControllerBase):
             if not subcampaign_json:
                 raise AssertionError(f'Subcampaign "{subcampaign_name}" does not exist')
 
-            subcampaign = Subcampaign(json_input=subcampaign_json)
+            subcampaign = Subcampaign.from_database(subcampaign_json)
             request.set('memory', subcampaign.get('memory'))
             request.set('sequences', subcampaign.get('sequences'))
             request.set('energy', subcampaign.get('energy'))
             request.set('cmssw_release', subcampaign.get('cmssw_release'))
             request.set('enable_harvesting', subcampaign.get('enable_harvesting'))
-            request_db.save(request.get_json())
+            request_db.save(request.get_json(copy=False))
+            ObjectChanges.saved(self.database_name, request.get_json(copy=False))
 
         return request
 
@@ -982,7 +1051,8 @@ class RequestController(ControllerBase):
         # Update priority in Stats2
         refresh_workflows_in_stats(workflow_names)
         # Finally save the request
-        request_db.save(request.get_json())
+        request_db.save(request.get_json(copy=False))
+        ObjectChanges.saved(self.database_name, request.get_json(copy=False))
 
         return request
 
@@ -9,6 +9,8 @@ from core_lib.utils.cache import TimeoutCache
 from core_lib.utils.connection_wrapper import ConnectionWrapper
 from core.model.subcampaign import Subcampaign
 from core.model.sequence import Sequence
+from core.utils.lumi_mask import LumiMask
+from core.utils.object_changes import ObjectChanges
 
 
 class SubcampaignController(ControllerBase):
@@ -16,7 +18,7 @@ class SubcampaignController(ControllerBase):
     Controller that has all actions related to a subcampaign
     """
 
-    # DCS json cache
+    # DCS json cache, DCS json is stored as lumi mask
     __dcs_cache = TimeoutCache(7200)
 
     def __init__(self):
@@ -24,6 +26,16 @@ class SubcampaignController(ControllerBase):
         self.database_name = 'subcampaigns'
         self.model_class = Subcampaign
 
+    def get(self, prepid, deleted=False):
+        """
+        Return a subcampaign loaded from database without checking attributes
+        """
+        subcampaign_json = Database(self.database_name).get(prepid)
+        if not subcampaign_json or (subcampaign_json.get('deleted') and not deleted):
+            raise ValueError(f'Subcampaign "{prepid}" does not exist')
+
+        return Subcampaign.from_database(subcampaign_json)
+
     def check_for_delete(self, obj):
         prepid = obj.get('prepid')
         requests_db = Database('requests')
@@ -34,6 +46,16 @@ class SubcampaignController(ControllerBase):
 
         return True
 
+    def after_create(self, obj):
+        ObjectChanges.saved(self.database_name, obj.get_json(copy=False))
+
+    def after_update(self, old_obj, new_obj, changed_values):
+        ObjectChanges.saved(self.database_name, new_obj.get_json(copy=False))
+
+    def after_delete(self, obj):
+        ObjectChanges.deleted(self.database_name, obj.get_prepid())
+        return True
+
     def get_editing_info(self, obj):
         editing_info = super().get_editing_info(obj)
         prepid = obj.get_prepid()
@@ -61,10 +83,6 @@ class SubcampaignController(ControllerBase):
         """
         Fetch a dict of runs and lumisection ranges for a subcampaign
         """
-        cached_value = SubcampaignController.__dcs_cache.get(subcampaign_name)
-        if cached_value:
-            return cached_value
-
         runs_json_path = self.get(subcampaign_name).get('runs_json_path')
         if not runs_json_path:
             return {}
@@ -79,9 +97,17 @@ class SubcampaignController(ControllerBase):
                 response = connection.api('GET', f'/CAF/certification/{runs_json_path}')
 
         response = json.loads(response.decode('utf-8'))
-        if not response:
-            SubcampaignController.__dcs_cache.set(subcampaign_name, {})
-            return {}
+        return response or {}
+
+    def get_dcs_mask(self, subcampaign_name):
+        """
+        Return subcampaign's DCS json as a lumi mask
+        Lumi mask takes about ten times less memory than the dict
+        """
+        cached_value = SubcampaignController.__dcs_cache.get(subcampaign_name)
+        if cached_value is not None:
+            return cached_value
 
-        SubcampaignController.__dcs_cache.set(subcampaign_name, response)
-        return response
+        mask = LumiMask.from_json(self.get_dcs_json(subcampaign_name))
+        SubcampaignController.__dcs_cache.set(subcampaign_name, mask)
+        return mask
@@ -7,7 +7,9 @@ from core_lib.controller.controller_base import ControllerBase
 from core_lib.utils.common_utils import dbs_datasetlist
 from core.model.model_base import ModelBase
 from core.model.ticket import Ticket
+from core.model.request_view import RequestView
 from core.controller.request_controller import RequestController
+from core.utils.object_changes import ObjectChanges
 
 
 class TicketController(ControllerBase):
@@ -20,6 +22,16 @@ class TicketController(ControllerBase):
         self.database_name = 'tickets'
         self.model_class = Ticket
 
+    def get(self, prepid, deleted=False):
+        """
+        Return a ticket loaded from database without checking attributes
+        """
+        ticket_json = Database(self.database_name).get(prepid)
+        if not ticket_json or (ticket_json.get('deleted') and not deleted):
+            raise ValueError(f'Ticket "{prepid}" does not exist')
+
+        return Ticket.from_database(ticket_json)
+
     def create(self, json_data):
         # Clean up the input
         ticket_db = Database(self.database_name)
@@ -52,7 +64,6 @@ class TicketController(ControllerBase):
             raise ValueError(f'Duplicates in input: {", ".join(duplicates)}')
 
         dataset_blacklist = set(Settings().get('dataset_blacklist'))
-        request_controller = RequestController()
         datasets = []
         for input_item in ticket_input:
             if ModelBase.dataset_check(input_item):
@@ -60,8 +71,7 @@ class TicketController(ControllerBase):
                 dataset = input_item.split('/')[1]
 
             elif ModelBase.request_id_check(input_item):
-                request = request_controller.get(input_item)
-                dataset = request.get_dataset()
+                dataset = RequestView.get(input_item).get_dataset()
 
             if dataset in dataset_blacklist:
                 raise AssertionError(f'Input dataset {input_item} is not '
@@ -112,6 +122,16 @@ class TicketController(ControllerBase):
         self.check_steps(new_obj)
         return True
 
+    def after_create(self, obj):
+        ObjectChanges.saved(self.database_name, obj.get_json(copy=False))
+
+    def after_update(self, old_obj, new_obj, changed_values):
+        ObjectChanges.saved(self.database_name, new_obj.get_json(copy=False))
+
+    def after_delete(self, obj):
+        ObjectChanges.deleted(self.database_name, obj.get_prepid())
+        return True
+
     def check_for_delete(self, obj):
         created_requests = obj.get('created_requests')
         prepid = obj.get('prepid')
@@ -187,7 +207,7 @@ class TicketController(ControllerBase):
         request_controller = RequestController()
         ticket_job_overwrite = ticket.get('job_dict_overwrite')
         with self.locker.get_lock(ticket_prepid):
-            ticket = Ticket(json_input=database.get(ticket_prepid))
+            ticket = Ticket.from_database(database.get(ticket_prepid))
             created_requests = ticket.get('created_requests')
             status = ticket.get('status')
             if status != 'new':
@@ -223,7 +243,7 @@ class TicketController(ControllerBase):
                             runs = request_controller.get_runs(subcampaign_name, input_item)
                             new_request_json['runs'] = runs
                             lumis = request_controller.get_lumisections(subcampaign_name, runs)
-                            new_request_json['lumisections'] = lumis
+                            new_request_json['lumisections'] = lumis.to_json()
                         except Exception as ex:
                             self.logger.error('Error getting runs or lumis for %s %s: \n%s',
                                               subcampaign_name,
@@ -239,7 +259,8 @@ class TicketController(ControllerBase):
                 ticket.set('created_requests', created_request_prepids)
                 ticket.set('status', 'done')
                 ticket.add_history('create_requests', created_request_prepids, None)
-                database.save(ticket.get_json())
+                database.save(ticket.get_json(copy=False))
+                ObjectChanges.saved(self.database_name, ticket.get_json(copy=False))
             except Exception as ex:
                 # Delete created requests if there was an Exception
                 for created_request in reversed(created_requests):
@@ -258,9 +279,7 @@ class TicketController(ControllerBase):
         prepid = ticket.get_prepid()
         self.logger.debug('Returning TWiki snippet for %s', prepid)
         acquisition_eras = {}
-        request_controller = RequestController()
-        for request_prepid in ticket.get('created_requests'):
-            request = request_controller.get(request_prepid)
+        for request in RequestView.get_many(ticket.get('created_requests')):
             acquisition_era = request.get_era()
             acquisition_eras.setdefault(acquisition_era, []).append(request)
 
@@ -272,8 +291,7 @@ class TicketController(ControllerBase):
             output_strings.append('| *Dataset* | *Monitoring link* | *Runs* |')
             for request in requests:
                 prepid = request.get_prepid()
-                runs = request.get('runs')
-                runs = ', '.join(str(r) for r in runs)
+                runs = ', '.join(str(r) for r in request.runs)
                 dataset = request.get_dataset()
                 output_strings.append(f'| {dataset} | [[{pmp_url}{prepid}][{prepid}]] | {runs} |')
 
@@ -1,6 +1,8 @@
 """
 Module that contains ModelBase class
 """
+import random
+import logging
 from core_lib.model.model_base import ModelBase as PdmVModelBase
 from core_lib.utils.common_utils import make_regex_matcher as regex
 
@@ -29,3 +31,68 @@ class ModelBase(PdmVModelBase):
         'priority': lambda priority: 20000 <= priority <= 1000000,
         'subcampaign': subcampaign_id_check,
     }
+
+    # Fraction of objects loaded from database that are checked anyway
+    verify_sample_rate = 0.01
+
+    @classmethod
+    def from_database(cls, json_input, **kwargs):
+        """
+        Return an object made of JSON that was loaded from the database
+        Attributes are not checked because they were checked before saving,
+        only a small sample of objects is checked and failures are logged
+        """
+        if random.random() < cls.verify_sample_rate:
+            try:
+                # Some constructors change their input
+                return cls(json_input=dict(json_input), check_attributes=True, **kwargs)
+            except Exception as ex:
+                logging.getLogger().error('%s %s loaded from database failed checks: %s',
+                                          cls.__name__,
+                                          json_input.get('prepid'),
+                                          ex)
+
+        return cls(json_input=json_input, check_attributes=False, **kwargs)
+
+    @classmethod
+    def get_scalar_attributes(cls):
+        """
+        Return a set of schema attributes that hold immutable scalar values
+        """
+        scalar_attributes = cls.__dict__.get('_scalar_attributes')
+        if scalar_attributes is None:
+            scalar_attributes = {attribute for attribute, default in cls.schema().items()
+                                 if isinstance(default, (str, int, float, bool))}
+            cls._scalar_attributes = scalar_attributes
+
+        return scalar_attributes
+
+    @staticmethod
+    def value_to_json(value):
+        """
+        Return JSON of a value that might have nested objects without copying
+        lists and dictionaries that do not have nested objects
+        """
+        if isinstance(value, PdmVModelBase):
+            return value.get_json(copy=False)
+
+        if isinstance(value, list) and value and isinstance(value[0], PdmVModelBase):
+            return [x.get_json(copy=False) for x in value]
+
+        return value
+
+    def get_json(self, copy=True):
+        """
+        Return JSON of the object
+        If copy is False, returned dictionary shares lists and dictionaries
+        with the object, so it must be only serialized or saved, not modified
+        Scalar attributes are taken as they are and only attributes that might
+        have nested objects are walked
+        """
+        if copy:
+            return super().get_json()
+
+        scalar_attributes = self.get_scalar_attributes()
+        return {attribute: (value if attribute in scalar_attributes
+                            else self.value_to_json(value))
+                for attribute, value in self._ModelBase__json.items()}
@@ -2,8 +2,11 @@
 Module that contains Request class
 """
 from copy import deepcopy
+from itertools import count
 from core.model.model_base import ModelBase
 from core.model.sequence import Sequence
+from core.model.request_view import RequestView
+from core.utils.run_ranges import RunRanges
 
 
 class Request(ModelBase):
@@ -63,6 +66,9 @@ class Request(ModelBase):
         'workflows': []
     }
 
+    # Unique versions of sequences of all requests
+    __sequences_versions = count()
+
     lambda_checks = {
         'prepid': ModelBase.request_id_check,
         'cmssw_release': ModelBase.cmssw_check,
@@ -85,19 +91,103 @@ class Request(ModelBase):
         'total_events': lambda events: events >= 0,
     }
 
-    def __init__(self, json_input=None, check_attributes=True):
+    def __init__(self, json_input=None, check_attributes=True, read_only=False):
+        """
+        Read only request does not copy json_input, so it shares values with
+        it, and builds sequences only when they are accessed
+        It returns copies of lists and dictionaries, so they can be changed
+        without changing json_input, and it is copied on the first change
+        """
+        self.read_only = False
+        self.lazy_sequences = None
+        # Changes when sequences or prepid change, invalidates positions of sequences
+        self.sequences_version = next(self.__sequences_versions)
+        self.__check_attributes = check_attributes
+        if not json_input or not read_only:
+            self._copy_from_json(json_input)
+            return
+
+        json_input = dict(json_input)
+        lazy_sequences = json_input.get('sequences', [])
+        json_input['sequences'] = []
+        # Runs can be given as numbers or compact ranges
+        json_input['runs'] = RunRanges.parse(json_input.get('runs', []))
+        ModelBase.__init__(self, json_input, check_attributes)
+        self.lazy_sequences = lazy_sequences
+        self.read_only = True
+
+    def _copy_from_json(self, json_input):
+        """
+        Initialize request with an independent copy of given JSON
+        """
+        self.lazy_sequences = None
+        self.sequences_version = next(self.__sequences_versions)
         if json_input:
-            json_input = deepcopy(json_input)
-            json_input['runs'] = [int(r) for r in json_input.get('runs', [])]
-            sequence_objects = []
-            for sequence_json in json_input.get('sequences', []):
-                sequence_objects.append(Sequence(json_input=sequence_json,
-                                                 parent=self,
-                                                 check_attributes=check_attributes))
+            lumisections = json_input.get('lumisections')
+            json_input = deepcopy({k: v for k, v in json_input.items()
+                                   if k != 'lumisections'})
+            json_input['sequences'] = self.build_sequences(json_input.get('sequences', []),
+                                                           self.__check_attributes)
+            if lumisections:
+                # Copy ranges as they are, which is faster than deepcopy
+                json_input['lumisections'] = {run: [list(r) for r in ranges]
+                                              for run, ranges in lumisections.items()}
 
-            json_input['sequences'] = sequence_objects
+            # Runs can be given as numbers or compact ranges
+            json_input['runs'] = RunRanges.parse(json_input.get('runs', []))
 
-        ModelBase.__init__(self, json_input, check_attributes)
+        ModelBase.__init__(self, json_input, self.__check_attributes)
+
+    def build_sequences(self, sequences_json, check_attributes):
+        """
+        Return a list of Sequence objects of this request
+        """
+        return [Sequence(json_input=sequence_json,
+                         parent=self,
+                         check_attributes=check_attributes)
+                for sequence_json in sequences_json]
+
+    def get(self, attribute):
+        if attribute == 'sequences' and self.lazy_sequences is not None:
+            # Sequence modifies it's input, so it gets a copy
+            sequences = self.build_sequences(deepcopy(self.lazy_sequences),
+                                             self.__check_attributes)
+            self.lazy_sequences = None
+            super().set('sequences', sequences)
+
+        value = super().get(attribute)
+        if self.read_only and isinstance(value, (list, dict)):
+            # Values are shared with json_input, so they must not be changed
+            if attribute == 'sequences':
+                return list(value)
+
+            return deepcopy(value)
+
+        return value
+
+    def make_writable(self):
+        """
+        Copy on write: turn read only request into an independent copy
+        """
+        if self.read_only:
+            self.read_only = False
+            self._copy_from_json(self.get_json())
+
+    def add_history(self, *args, **kwargs):
+        self.make_writable()
+        return super().add_history(*args, **kwargs)
+
+    def set(self, attribute, value=None):
+        self.make_writable()
+        if attribute in ('sequences', 'prepid'):
+            self.sequences_version = next(self.__sequences_versions)
+
+        return super().set(attribute, value)
+
+    def get_json(self, copy=True):
+        # Make sure sequences are built
+        self.get('sequences')
+        return super().get_json(copy)
 
     def check_attribute(self, attribute_name, attribute_value):
         if attribute_name == 'input':
@@ -139,11 +229,7 @@ class Request(ModelBase):
         """
         Return era based on input dataset
         """
-        input_dataset_parts = [x for x in self.get('input')['dataset'].split('/') if x]
-        if len(input_dataset_parts) < 2:
-            return self.get_prepid().split('-')[1]
-
-        return input_dataset_parts[1].split('-')[0]
+        return RequestView.era_of(self.get('input')['dataset'], self.get_prepid())
 
     def get_input_processing_string(self):
         """
@@ -163,20 +249,21 @@ class Request(ModelBase):
         """
         Return primary dataset based on input dataset
         """
-        input_dataset_parts = [x for x in self.get('input')['dataset'].split('/') if x]
-        if not input_dataset_parts:
-            return self.get_prepid().split('-')[2]
-
-        return input_dataset_parts[0]
+        return RequestView.dataset_of(self.get('input')['dataset'], self.get_prepid())
 
     def get_request_string(self):
         """
         Return request string made of era, dataset and processing string
         """
-        processing_string = self.get('processing_string')
-        era = self.get_era()
-        dataset = self.get_dataset()
-        return f'{era}_{dataset}_{processing_string}'.strip('_')
+        return RequestView.request_string_of(self.get_era(),
+                                             self.get_dataset(),
+                                             self.get('processing_string'))
+
+    def get_run_ranges(self):
+        """
+        Return runs as a list of [first, last] ranges
+        """
+        return RunRanges.compress(self.get('runs'))
 
     def get_datatiers(self):
         """
@@ -0,0 +1,114 @@
+"""
+Module that contains RequestView class
+"""
+from core_lib.database.database import Database
+
+
+class RequestView():
+    """
+    RequestView is a lightweight read only view of a few request attributes
+    It is loaded with a projection and is meant for lists and summaries that
+    do not need a full Request object
+    """
+
+    __slots__ = ('prepid', 'status', 'subcampaign', 'processing_string',
+                 'input_dataset', 'input_request', 'runs')
+
+    projection = {'_id': 0,
+                  'prepid': 1,
+                  'status': 1,
+                  'subcampaign': 1,
+                  'processing_string': 1,
+                  'input': 1,
+                  'runs': 1}
+
+    def __init__(self, request_json):
+        self.prepid = request_json.get('prepid', '')
+        self.status = request_json.get('status', '')
+        self.subcampaign = request_json.get('subcampaign', '')
+        self.processing_string = request_json.get('processing_string', '')
+        request_input = request_json.get('input', {})
+        self.input_dataset = request_input.get('dataset', '')
+        self.input_request = request_input.get('request', '')
+        self.runs = request_json.get('runs', [])
+
+    @classmethod
+    def get(cls, prepid):
+        """
+        Return a view of a single request
+        """
+        request_json = Database('requests').collection.find_one({'prepid': prepid,
+                                                                 'deleted': {'$ne': True}},
+                                                                cls.projection)
+        if not request_json:
+            raise ValueError(f'Request "{prepid}" does not exist')
+
+        return cls(request_json)
+
+    @classmethod
+    def get_many(cls, prepids):
+        """
+        Return views of requests with given prepids in the same order,
+        missing requests are skipped
+        """
+        collection = Database('requests').collection
+        requests = collection.find({'prepid': {'$in': list(prepids)},
+                                    'deleted': {'$ne': True}},
+                                   cls.projection)
+        views = {x['prepid']: cls(x) for x in requests}
+        return [views[prepid] for prepid in prepids if prepid in views]
+
+    @staticmethod
+    def era_of(input_dataset, prepid):
+        """
+        Return era based on input dataset or prepid
+        """
+        input_dataset_parts = [x for x in input_dataset.split('/') if x]
+        if len(input_dataset_parts) < 2:
+            return prepid.split('-')[1]
+
+        return input_dataset_parts[1].split('-')[0]
+
+    @staticmethod
+    def dataset_of(input_dataset, prepid):
+        """
+        Return primary dataset based on input dataset or prepid
+        """
+        input_dataset_parts = [x for x in input_dataset.split('/') if x]
+        if not input_dataset_parts:
+            return prepid.split('-')[2]
+
+        return input_dataset_parts[0]
+
+    @staticmethod
+    def request_string_of(era, dataset, processing_string):
+        """
+        Return request string made of era, dataset and processing string
+        """
+        return f'{era}_{dataset}_{processing_string}'.strip('_')
+
+    def get_prepid(self):
+        """
+        Return prepid of the request
+        """
+        return self.prepid
+
+    def get_era(self):
+        """
+        Return era based on input dataset
+        """
+        return self.era_of(self.input_dataset, self.prepid)
+
+    def get_dataset(self):
+        """
+        Return primary dataset based on input dataset
+        """
+        return self.dataset_of(self.input_dataset, self.prepid)
+
+    def get_request_string(self):
+        """
+        Return request string made of era, dataset and processing string
+        """
+        return self.request_string_of(self.get_era(),
+                                      self.get_dataset(),
+                                      self.processing_string)
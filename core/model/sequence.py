@@ -72,6 +72,10 @@ class Sequence(ModelBase):
 
     def __init__(self, json_input=None, parent=None, check_attributes=True):
         self.parent = None
+        # Index and name in parent, cached for parent's sequences version
+        self.position_version = None
+        self.position_index = 0
+        self.position_name = ''
         if json_input:
             if json_input.get('gpu', {}).get('requires') not in ('optional', 'required'):
                 json_input['gpu'] = self.schema().get('gpu')
@@ -81,8 +85,9 @@ class Sequence(ModelBase):
         if parent:
             self.parent = weakref.ref(parent)
 
-        self.check_attribute('eventcontent', self.get('eventcontent'))
-        self.check_attribute('datatier', self.get('datatier'))
+        if check_attributes:
+            self.check_attribute('eventcontent', self.get('eventcontent'))
+            self.check_attribute('datatier', self.get('datatier'))
 
     def get_prepid(self):
         if not self.parent:
@@ -127,12 +132,26 @@ class Sequence(ModelBase):
     def get_index_in_parent(self):
         """
         Return sequence's index in parent's list of sequences
+        Positions of all sequences are cached until parent's sequences change
         """
-        for index, sequence in enumerate(self.parent().get('sequences')):
-            if self == sequence:
-                return index
+        parent = self.parent()
+        sequences = parent.get('sequences')
+        version = parent.sequences_version
+        if self.position_version == version:
+            return self.position_index
+
+        parent_prepid = parent.get_prepid()
+        last_index = len(sequences) - 1
+        for index, sequence in enumerate(sequences):
+            name = parent_prepid if index == last_index else f'{parent_prepid}_{index}'
+            sequence.position_version = version
+            sequence.position_index = index
+            sequence.position_name = name
+
+        if self.position_version != version:
+            raise AssertionError(f'Sequence is not a child of {parent_prepid}')
 
-        raise AssertionError(f'Sequence is not a child of {self.parent().get_prepid()}')
+        return self.position_index
 
     def get_name(self):
         """
@@ -148,14 +167,8 @@ class Sequence(ModelBase):
         If there is only one sequence, it will be the last one
         and have the same name as parent prepid
         """
-        index = self.get_index_in_parent()
-        parent_prepid = self.parent().get_prepid()
-        if index != len(self.parent().get('sequences')) - 1:
-            sequence_name = f'{parent_prepid}_{index}'
-        else:
-            sequence_name = f'{parent_prepid}'
-
-        return sequence_name
+        self.get_index_in_parent()
+        return self.position_name
 
     def get_config_file_names(self):
         """
@@ -235,8 +248,17 @@ class Sequence(ModelBase):
                 elif all_runs:
                     das_file = f'{sequence_name}_files.txt'
                     das_query += '# Query DAS to get list of files for specified runs\n'
+                    run_ranges = self.parent().get_run_ranges()
+                    # Consecutive runs are queried as ranges
+                    for first, last in [r for r in run_ranges if r[0] != r[1]]:
+                        das_query += 'dasgoclient --limit 0 '
+                        das_query += (f'--query "file dataset={input_dataset} '
+                                      f'run between [{first},{last}]" ')
+                        das_query += f'>> {das_file}\n'
+
                     # Chunkify to 25 runs, otherwise script line gets very long
-                    for runs in self.chunkify(all_runs, 25):
+                    single_runs = [r[0] for r in run_ranges if r[0] == r[1]]
+                    for runs in self.chunkify(single_runs, 25):
                         runs = ','.join([str(r) for r in runs])
                         das_query += 'dasgoclient --limit 0 '
                         das_query += f'--query "file dataset={input_dataset} run in [{runs}]" '
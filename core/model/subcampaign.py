@@ -49,7 +49,8 @@ class Subcampaign(ModelBase):
             json_input['runs_json_path'] = json_input.get('runs_json_path', '').strip().lstrip('/')
             sequence_objects = []
             for sequence_json in json_input.get('sequences', []):
-                sequence_objects.append(Sequence(json_input=sequence_json))
+                sequence_objects.append(Sequence(json_input=sequence_json,
+                                                 check_attributes=check_attributes))
 
             json_input['sequences'] = sequence_objects
 
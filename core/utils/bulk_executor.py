@@ -0,0 +1,75 @@
+"""
+Module that contains BulkExecutor class
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import environment
+from core.model.model_base import ModelBase
+
+
+class BulkExecutor():
+    """
+    BulkExecutor runs an action for multiple prepids in a bounded thread pool
+    and collects result or error of each prepid instead of failing on the
+    first error
+    Actions acquire their own locks, so locks of prepids are respected
+    """
+
+    def __init__(self, max_workers=None, wrap=None):
+        self.max_workers = max_workers or environment.BULK_THREADS
+        # Function that wraps each task, e.g. to copy request context
+        self.wrap = wrap
+        self.logger = logging.getLogger()
+
+    def run_one(self, action, prepid):
+        """
+        Run action for a single prepid and return a result dictionary
+        """
+        try:
+            return {'prepid': prepid,
+                    'success': True,
+                    'message': '',
+                    'response': action(prepid)}
+        except Exception as ex:
+            self.logger.error('Error processing %s: %s', prepid, ex)
+            return {'prepid': prepid,
+                    'success': False,
+                    'message': str(ex),
+                    'response': None}
+
+    def run(self, action, prepids):
+        """
+        Run action for each unique prepid and return a list of result
+        dictionaries in the same order as prepids
+        """
+        prepids = list(dict.fromkeys(prepids))
+        if not prepids:
+            return []
+
+        tasks = []
+        for prepid in prepids:
+            task = partial(self.run_one, action, prepid)
+            if self.wrap:
+                task = self.wrap(task)
+
+            tasks.append(task)
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as executor:
+            futures = [executor.submit(task) for task in tasks]
+            return [future.result() for future in futures]
+
+    @staticmethod
+    def get_output(results):
+        """
+        Return an API response with results of all prepids, objects are
+        converted to JSON
+        """
+        for result in results:
+            if isinstance(result['response'], ModelBase):
+                result['response'] = result['response'].get_json(copy=False)
+
+        errors = [f'{r["prepid"]}: {r["message"]}' for r in results if not r['success']]
+        return {'response': results,
+                'success': not errors,
+                'message': '\n'.join(errors)}
@@ -0,0 +1,159 @@
+"""
+Module that contains IndexManager class
+"""
+import logging
+from threading import Thread
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+from core_lib.database.database import Database
+from core.model.request import Request
+from core.model.subcampaign import Subcampaign
+from core.model.ticket import Ticket
+from core.utils.query_builder import QueryBuilder
+from core.utils.search_terms import SearchTerms
+
+
+class IndexManager():
+    """
+    IndexManager makes sure that attributes used in search are indexed
+    Required indexes are derived from search renames (workflows.name,
+    input.request, history.0.time, ...) and a few frequently searched
+    attributes, model schemas are used to check that attributes exist and
+    whether index will be multikey
+    Compound indexes of other collections, e.g. search terms, are checked by
+    their keys
+    It reports indexes that are missing and indexes that were not used
+    """
+
+    model_classes = {'subcampaigns': Subcampaign,
+                     'tickets': Ticket,
+                     'requests': Request}
+    # Attributes that are often searched, but are not renamed
+    indexed_attributes = {'subcampaigns': ['prepid'],
+                          'tickets': ['prepid', 'status'],
+                          'requests': ['prepid', 'status', 'subcampaign', 'processing_string']}
+    # Collection -> lists of (attribute, direction) keys of compound indexes
+    compound_indexes = {SearchTerms.collection_name: SearchTerms.indexes}
+
+    def __init__(self):
+        self.logger = logging.getLogger()
+
+    def get_required_attributes(self, collection_name):
+        """
+        Return a sorted list of attributes of a collection that should be indexed
+        """
+        if collection_name not in self.model_classes:
+            return []
+
+        query_builder = QueryBuilder(collection_name)
+        attributes = set(self.indexed_attributes.get(collection_name, []))
+        for value in QueryBuilder.get_search_renames(collection_name):
+            attributes.add(query_builder.get_attribute(value)[0])
+
+        return sorted(attributes)
+
+    def get_index_info(self, collection_name, attribute):
+        """
+        Return a dictionary with information whether attribute is in the schema
+        and whether index of it would be multikey
+        """
+        schema = self.model_classes[collection_name].schema()
+        root = attribute.split('.')[0]
+        return {'attribute': attribute,
+                'in_schema': root in schema,
+                'multikey': isinstance(schema.get(root), list)}
+
+    @staticmethod
+    def get_unused_indexes(collection):
+        """
+        Return names of indexes that were not used since server restart
+        """
+        try:
+            stats = list(collection.aggregate([{'$indexStats': {}}]))
+        except OperationFailure:
+            # Not permitted or not supported
+            return None
+
+        return sorted(s['name'] for s in stats
+                      if s['name'] != '_id_' and not s.get('accesses', {}).get('ops'))
+
+    def check(self, collection_name, create=False):
+        """
+        Check indexes of a collection and optionally create missing ones
+        Return a report with required, missing, created and unused indexes
+        """
+        collection = Database(collection_name).collection
+        # Index can be used if attribute is the first key of it
+        indexes = collection.index_information()
+        existing = {}
+        for name, index in indexes.items():
+            existing.setdefault(index['key'][0][0], name)
+
+        report = {'required': [], 'missing': [], 'created': [], 'unused': []}
+        for attribute in self.get_required_attributes(collection_name):
+            info = self.get_index_info(collection_name, attribute)
+            info['index'] = existing.get(attribute)
+            report['required'].append(info)
+            if not info['in_schema']:
+                self.logger.warning('%s attribute %s is not in the schema',
+                                    collection_name,
+                                    attribute)
+
+            if info['index']:
+                continue
+
+            if not create:
+                report['missing'].append(attribute)
+                continue
+
+            self.logger.info('Creating %s index on %s', collection_name, attribute)
+            info['index'] = collection.create_index([(attribute, ASCENDING)])
+            report['created'].append(attribute)
+
+        existing_keys = {tuple(tuple(k) for k in index['key']) for index in indexes.values()}
+        for keys in self.compound_indexes.get(collection_name, []):
+            name = '_'.join(f'{attribute}_{direction}' for attribute, direction in keys)
+            if tuple(tuple(k) for k in keys) in existing_keys:
+                continue
+
+            if not create:
+                report['missing'].append(name)
+                continue
+
+            self.logger.info('Creating %s index %s', collection_name, name)
+            collection.create_index(keys)
+            report['created'].append(name)
+
+        report['unused'] = self.get_unused_indexes(collection)
+        return report
+
+    def check_all(self, collection_names=None, create=False):
+        """
+        Check indexes of all model and search terms collections or given collections
+        """
+        collection_names = (collection_names
+                            or list(self.model_classes) + list(self.compound_indexes))
+        reports = {}
+        for collection_name in collection_names:
+            report = self.check(collection_name, create)
+            reports[collection_name] = report
+            self.logger.info('%s indexes - missing: %s, created: %s, unused: %s',
+                             collection_name,
+                             ', '.join(report['missing']) or 'none',
+                             ', '.join(report['created']) or 'none',
+                             ', '.join(report['unused'] or []) or 'none')
+
+        return reports
+
+    def check_all_in_background(self, create=False):
+        """
+        Check indexes of all collections in a background thread, so that
+        start up is not blocked by index builds
+        """
+        def check_all():
+            try:
+                self.check_all(create=create)
+            except Exception as ex:
+                self.logger.error('Error checking indexes: %s', ex)
+
+        Thread(target=check_all, name='index-check', daemon=True).start()
@@ -0,0 +1,79 @@
+"""
+Module that contains LRUCache class
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache():
+    """
+    Thread safe cache with limited size and optional timeout of entries
+    Least recently used entries are evicted first
+    Keeps hit and miss counters
+    """
+
+    def __init__(self, max_size=1000, timeout=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.lock = Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """
+        Return cached value or default if there is no entry or it expired
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.time():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+
+                self.entries.pop(key)
+
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """
+        Add or update an entry, evict least recently used entries if needed
+        """
+        expires_at = time.time() + self.timeout if self.timeout else None
+        with self.lock:
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def remove_if(self, predicate):
+        """
+        Remove all entries for which predicate(key, value) is true
+        """
+        with self.lock:
+            for key in [k for k, (v, _) in self.entries.items() if predicate(k, v)]:
+                self.entries.pop(key)
+
+    def clear(self):
+        """
+        Remove all entries
+        """
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self):
+        """
+        Return a dictionary with cache size and hit and miss counters
+        """
+        with self.lock:
+            requests = self.hits + self.misses
+            return {'size': len(self.entries),
+                    'max_size': self.max_size,
+                    'timeout': self.timeout,
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'hit_rate': round(self.hits / requests, 4) if requests else 0.0}
@@ -0,0 +1,108 @@
+"""
+Module that contains LumiMask class
+"""
+from array import array
+from bisect import bisect_left
+
+
+class LumiMask():
+    """
+    LumiMask is a compact set of runs and their lumisection ranges, e.g. a
+    DCS certification JSON {"355100": [[1, 50], [52, 300]], ...}
+    Runs, ranges and offsets of runs' ranges are stored in sorted integer
+    arrays, JSON is built only when it is needed
+    Overlapping and adjacent ranges are merged
+    """
+
+    __slots__ = ('runs', 'offsets', 'bounds', 'json')
+
+    def __init__(self, runs=None, offsets=None, bounds=None):
+        # Sorted run numbers
+        self.runs = runs if runs is not None else array('I')
+        # Ranges of run i are bounds[offsets[i]:offsets[i + 1]]
+        self.offsets = offsets if offsets is not None else array('I', [0])
+        # Flat list of first and last lumisections of ranges
+        self.bounds = bounds if bounds is not None else array('I')
+        self.json = None
+
+    @classmethod
+    def from_json(cls, lumisections):
+        """
+        Make a mask from a dictionary of runs and lists of [first, last] ranges
+        """
+        mask = cls()
+        for run in sorted(int(r) for r in lumisections):
+            ranges = lumisections.get(str(run), lumisections.get(run))
+            merged = []
+            for first, last in sorted((int(f), int(l)) for f, l in ranges):
+                if merged and first <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], last)
+                else:
+                    merged.append([first, last])
+
+            if not merged:
+                continue
+
+            mask.runs.append(run)
+            for first, last in merged:
+                mask.bounds.append(first)
+                mask.bounds.append(last)
+
+            mask.offsets.append(len(mask.bounds))
+
+        return mask
+
+    def to_json(self):
+        """
+        Return a dictionary of runs and lists of [first, last] ranges
+        It is built once and shared, so it must not be modified
+        """
+        if self.json is None:
+            self.json = {str(run): self.get_ranges(index)
+                         for index, run in enumerate(self.runs)}
+
+        return self.json
+
+    def get_ranges(self, index):
+        """
+        Return a list of [first, last] ranges of run at given index
+        """
+        bounds = self.bounds[self.offsets[index]:self.offsets[index + 1]]
+        return [[bounds[i], bounds[i + 1]] for i in range(0, len(bounds), 2)]
+
+    def __len__(self):
+        return len(self.runs)
+
+    def __contains__(self, run):
+        index = bisect_left(self.runs, int(run))
+        return index < len(self.runs) and self.runs[index] == int(run)
+
+    def get_runs(self):
+        """
+        Return a list of run numbers
+        """
+        return list(self.runs)
+
+    def get_lumisection_count(self):
+        """
+        Return total number of lumisections in all runs
+        """
+        return sum(self.bounds[i + 1] - self.bounds[i] + 1 for i in range(0, len(self.bounds), 2))
+
+    def subset(self, runs):
+        """
+        Return a new mask that has only given runs
+        """
+        subset = LumiMask()
+        index = 0
+        for run in sorted({int(r) for r in runs}):
+            # Runs are sorted, so search can start from the previous run
+            index = bisect_left(self.runs, run, index)
+            if index == len(self.runs) or self.runs[index] != run:
+                continue
+
+            subset.runs.append(run)
+            subset.bounds.extend(self.bounds[self.offsets[index]:self.offsets[index + 1]])
+            subset.offsets.append(len(subset.bounds))
+
+        return subset
@@ -0,0 +1,70 @@
+"""
+Module that contains ObjectChanges class
+"""
+from threading import Lock
+from core.utils.prepid_index import PrepidIndex
+from core.utils.search_terms import SearchTerms
+
+
+class ObjectChanges():
+    """
+    ObjectChanges propagates saved and deleted objects to everything that is
+    derived from the database: search terms, in-memory prepid indexes and
+    per-process versions of collections that are used to invalidate caches
+    It must be called after every save or delete of an object
+    """
+
+    __versions = {}
+    __lock = Lock()
+    __listeners = []
+
+    @classmethod
+    def add_listener(cls, listener):
+        """
+        Add a function that will be called with database name, object JSON
+        and prepid after every change, object JSON is None if object was deleted
+        """
+        cls.__listeners.append(listener)
+
+    @classmethod
+    def __notify(cls, database_name, obj_json, prepid):
+        """
+        Call all listeners
+        """
+        for listener in cls.__listeners:
+            listener(database_name, obj_json, prepid)
+
+    @classmethod
+    def get_version(cls, database_name):
+        """
+        Return number of changes of collection made by this process
+        """
+        return cls.__versions.get(database_name, 0)
+
+    @classmethod
+    def __bump_version(cls, database_name):
+        """
+        Increase version of a collection
+        """
+        with cls.__lock:
+            cls.__versions[database_name] = cls.__versions.get(database_name, 0) + 1
+
+    @classmethod
+    def saved(cls, database_name, obj_json):
+        """
+        Object was created or updated
+        """
+        cls.__bump_version(database_name)
+        SearchTerms().update(database_name, obj_json)
+        PrepidIndex.get_index(database_name, reload=False).add(obj_json['prepid'])
+        cls.__notify(database_name, obj_json, obj_json['prepid'])
+
+    @classmethod
+    def deleted(cls, database_name, prepid):
+        """
+        Object was deleted
+        """
+        cls.__bump_version(database_name)
+        SearchTerms().remove(database_name, prepid)
+        PrepidIndex.get_index(database_name, reload=False).remove(prepid)
+        cls.__notify(database_name, None, prepid)
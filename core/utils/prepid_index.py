@@ -0,0 +1,203 @@
+"""
+Module that contains PrepidIndex class
+"""
+import re
+import time
+import bisect
+import logging
+from threading import RLock, Thread
+from core_lib.database.database import Database
+
+
+class PrepidIndex():
+    """
+    PrepidIndex is an in-memory index of prepids of a single database
+    It keeps a sorted list of lowercase prepids and a trigram posting table,
+    so prepid suggestions can be found without querying the database
+    Index is per process: it is updated incrementally by controllers and
+    fully reloaded in a background thread every reload_interval seconds to
+    pick up changes made by other processes
+    Changes made during a reload are replayed after it
+    """
+
+    __indexes = {}
+    __indexes_lock = RLock()
+    ngram_size = 3
+    reload_interval = 600
+
+    def __init__(self, database_name):
+        self.logger = logging.getLogger()
+        self.database_name = database_name
+        self.lock = RLock()
+        self.sorted_prepids = []
+        self.prepids = {}
+        self.postings = {}
+        self.loaded_at = 0
+        self.loaded = False
+        # Changes made while index is being reloaded, None if it is not reloading
+        self.changes = None
+
+    @classmethod
+    def get_index(cls, database_name, reload=True):
+        """
+        Return index of given database, start a reload in the background if it
+        is expired and reload is True
+        """
+        with cls.__indexes_lock:
+            index = cls.__indexes.get(database_name)
+            if index is None:
+                index = PrepidIndex(database_name)
+                cls.__indexes[database_name] = index
+
+        if reload:
+            index.reload_if_expired()
+
+        return index
+
+    def reload_if_expired(self):
+        """
+        Start a reload in a background thread if index is expired and
+        it is not being reloaded already
+        """
+        with self.lock:
+            if self.changes is not None:
+                return
+
+            if time.time() - self.loaded_at <= self.reload_interval:
+                return
+
+            self.changes = []
+
+        Thread(target=self.load, name=f'{self.database_name}-prepid-index', daemon=True).start()
+
+    @classmethod
+    def ngrams(cls, value):
+        """
+        Return a set of n-grams of given lowercase value
+        """
+        size = cls.ngram_size
+        return {value[i:i + size] for i in range(len(value) - size + 1)}
+
+    def load(self):
+        """
+        Load all prepids from the database
+        """
+        start = time.time()
+        with self.lock:
+            if self.changes is None:
+                self.changes = []
+
+        prepids = {}
+        postings = {}
+        try:
+            collection = Database(self.database_name).collection
+            documents = collection.find({'deleted': {'$ne': True}}, {'prepid': 1, '_id': 0})
+            for document in documents:
+                prepid = document.get('prepid')
+                if not prepid:
+                    continue
+
+                lower_prepid = prepid.lower()
+                prepids[lower_prepid] = prepid
+                for ngram in self.ngrams(lower_prepid):
+                    postings.setdefault(ngram, set()).add(lower_prepid)
+        except Exception as ex:
+            self.logger.error('Error loading %s prepids to index: %s', self.database_name, ex)
+            with self.lock:
+                # Try again after a while
+                self.loaded_at = time.time()
+                self.changes = None
+
+            return
+
+        with self.lock:
+            changes = self.changes
+            self.changes = None
+            self.prepids = prepids
+            self.postings = postings
+            self.sorted_prepids = sorted(prepids)
+            self.loaded_at = time.time()
+            self.loaded = True
+            for method, prepid in changes:
+                method(prepid)
+
+        self.logger.info('Loaded %s %s prepids to index in %.2fs',
+                         len(prepids),
+                         self.database_name,
+                         time.time() - start)
+
+    def add(self, prepid):
+        """
+        Add a prepid to the index
+        """
+        lower_prepid = prepid.lower()
+        with self.lock:
+            if self.changes is not None:
+                self.changes.append((self.add, prepid))
+
+            if lower_prepid in self.prepids:
+                return
+
+            self.prepids[lower_prepid] = prepid
+            bisect.insort(self.sorted_prepids, lower_prepid)
+            for ngram in self.ngrams(lower_prepid):
+                self.postings.setdefault(ngram, set()).add(lower_prepid)
+
+    def remove(self, prepid):
+        """
+        Remove a prepid from the index
+        """
+        lower_prepid = prepid.lower()
+        with self.lock:
+            if self.changes is not None:
+                self.changes.append((self.remove, prepid))
+
+            if self.prepids.pop(lower_prepid, None) is None:
+                return
+
+            position = bisect.bisect_left(self.sorted_prepids, lower_prepid)
+            if position < len(self.sorted_prepids):
+                if self.sorted_prepids[position] == lower_prepid:
+                    self.sorted_prepids.pop(position)
+
+            for ngram in self.ngrams(lower_prepid):
+                posting = self.postings.get(ngram)
+                if posting is not None:
+                    posting.discard(lower_prepid)
+                    if not posting:
+                        self.postings.pop(ngram)
+
+    def suggest(self, query, limit=20):
+        """
+        Return up to limit prepids that contain all space or asterisk separated
+        fragments of query in the same order
+        """
+        fragments = [x for x in re.split('[ *]+', query.lower()) if x]
+        if not fragments:
+            return []
+
+        matcher = re.compile('.*'.join(re.escape(x) for x in fragments))
+        ngrams = set()
+        for fragment in fragments:
+            ngrams |= self.ngrams(fragment)
+
+        with self.lock:
+            if ngrams:
+                postings = sorted((self.postings.get(n, set()) for n in ngrams), key=len)
+                matching = set(postings[0]).intersection(*postings[1:])
+                if len(matching) * 8 < len(self.sorted_prepids):
+                    candidates = sorted(matching)
+                else:
+                    # Sorting many candidates is slower than walking the sorted list
+                    candidates = (x for x in self.sorted_prepids if x in matching)
+            else:
+                candidates = self.sorted_prepids
+
+            results = []
+            for candidate in candidates:
+                if matcher.search(candidate):
+                    results.append(self.prepids[candidate])
+                    if len(results) >= limit:
+                        break
+
+        return results
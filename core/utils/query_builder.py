@@ -0,0 +1,280 @@
+"""
+Module that contains QueryBuilder class
+"""
+import re
+from core.utils.lru_cache import LRUCache
+
+# Attribute names used in search that are renamed to actual paths in objects
+SEARCH_RENAMES = [
+    ('requests', 'runs', 'runs<int>'),
+    ('requests', 'run', 'runs<int>'),
+    ('requests', 'workflows', 'workflows.name'),
+    ('requests', 'workflow', 'workflows.name'),
+    ('requests', 'output_dataset', 'output_datasets'),
+    ('requests', 'input_dataset', 'input.dataset'),
+    ('requests', 'input_request', 'input.request'),
+    ('requests', 'created_on', 'history.0.time'),
+    ('requests', 'created_by', 'history.0.user'),
+    ('subcampaigns', 'created_on', 'history.0.time'),
+    ('subcampaigns', 'created_by', 'history.0.user'),
+    ('tickets', 'created_on', 'history.0.time'),
+    ('tickets', 'created_by', 'history.0.user'),
+    ('tickets', 'subcampaign', 'steps.subcampaign'),
+    ('tickets', 'processing_string', 'steps.processing_string'),
+]
+
+
+class QueryBuilder():
+    """
+    QueryBuilder turns "&&" separated attribute=value query strings that are
+    used in search into MongoDB filters
+    Comma separated values are alternatives, asterisks are wildcards
+    Attribute names can be renamed and given a type, e.g. runs -> runs<int>
+    Numeric values can be inclusive ranges, e.g. runs=355100..356000
+    Built filters are cached, so repeated queries are not parsed again
+    """
+
+    __search_renames = {}
+    __types = {'<int>': int, '<float>': float, '<bool>': bool}
+    range_separator = '..'
+    # (collection, model class, query string, ignore case) -> MongoDB filter
+    query_cache = LRUCache(max_size=1000)
+
+    def __init__(self, collection_name, model_class=None):
+        self.collection_name = collection_name
+        self.model_class = model_class
+
+    @classmethod
+    def add_search_rename(cls, collection_name, value, renamed_value):
+        """
+        Add a rename of attribute used in search, e.g. run -> runs<int>
+        """
+        cls.__search_renames.setdefault(collection_name, {})[value] = renamed_value
+        cls.query_cache.clear()
+
+    @classmethod
+    def get_search_renames(cls, collection_name):
+        """
+        Return a dictionary of search renames of a collection
+        """
+        return dict(cls.__search_renames.get(collection_name, {}))
+
+    def get_attribute(self, attribute):
+        """
+        Return renamed attribute name and it's type
+        """
+        attribute = attribute.strip()
+        attribute = self.__search_renames.get(self.collection_name, {}).get(attribute, attribute)
+        for suffix, value_type in self.__types.items():
+            if attribute.endswith(suffix):
+                return attribute[:-len(suffix)], value_type
+
+        if self.model_class:
+            default_value = self.model_class.schema().get(attribute.split('.')[0])
+            # bool must be checked before int because bool is a subclass of int
+            for value_type in (bool, int, float):
+                if isinstance(default_value, value_type):
+                    return attribute, value_type
+
+        return attribute, str
+
+    def is_multikey(self, attribute):
+        """
+        Return whether attribute is a list or inside a list in the schema
+        Positional paths, e.g. history.0.time, select a single element
+        """
+        if not self.model_class:
+            return False
+
+        parts = attribute.split('.')
+        if not isinstance(self.model_class.schema().get(parts[0]), list):
+            return False
+
+        return len(parts) < 2 or not parts[1].isdigit()
+
+    @classmethod
+    def build_range(cls, value_type, value, multikey=False):
+        """
+        Return a condition for an inclusive range "lower..upper", either of
+        the bounds can be omitted
+        Ranges of list attributes must be matched by a single element
+        """
+        lower, upper = value.split(cls.range_separator, 1)
+        condition = {}
+        if lower.strip():
+            condition['$gte'] = value_type(lower)
+
+        if upper.strip():
+            condition['$lte'] = value_type(upper)
+
+        if not condition:
+            raise ValueError(f'Range "{value}" has no bounds')
+
+        if multikey:
+            return {'$elemMatch': condition}
+
+        return condition
+
+    @staticmethod
+    def wildcard_to_regex(value, ignore_case=True):
+        """
+        Return a compiled anchored regex for value with asterisks as wildcards
+        """
+        pattern = '.*'.join(re.escape(part) for part in value.split('*'))
+        return re.compile(f'^{pattern}$', re.IGNORECASE if ignore_case else 0)
+
+    @staticmethod
+    def get_prefix(value):
+        """
+        Return literal prefix if value is a "starts with" query, e.g. ReReco-Run2022*
+        Return None for any other value
+        """
+        if value.count('*') != 1 or not value.endswith('*') or len(value) < 2:
+            return None
+
+        return value[:-1]
+
+    @staticmethod
+    def prefix_range(prefix):
+        """
+        Return a range condition that selects strings starting with prefix
+        Unlike a regex, range is always served by index bounds
+        """
+        upper = prefix
+        while upper and upper[-1] == chr(0x10FFFF):
+            upper = upper[:-1]
+
+        if not upper:
+            return {'$gte': prefix}
+
+        return {'$gte': prefix, '$lt': upper[:-1] + chr(ord(upper[-1]) + 1)}
+
+    def build_condition(self, value_type, value, ignore_case=True, multikey=False):
+        """
+        Return a condition for a single value of an attribute
+        """
+        if value_type is bool:
+            return value.lower() == 'true'
+
+        if value_type in (int, float):
+            if self.range_separator in value:
+                return self.build_range(value_type, value, multikey)
+
+            return value_type(value)
+
+        prefix = self.get_prefix(value)
+        if prefix and (not ignore_case or prefix.lower() == prefix.upper()):
+            # Prefix without letters is the same in any case
+            return self.prefix_range(prefix)
+
+        if '*' in value or ignore_case:
+            return self.wildcard_to_regex(value, ignore_case)
+
+        return value
+
+    def build_part(self, attribute, value, ignore_case=True):
+        """
+        Return a filter for a single attribute=value pair
+        """
+        attribute, value_type = self.get_attribute(attribute)
+        multikey = self.is_multikey(attribute)
+        values = [x.strip() for x in value.split(',') if x.strip()] or ['']
+        conditions = [self.build_condition(value_type, x, ignore_case, multikey)
+                      for x in values]
+        if len(conditions) == 1:
+            return {attribute: conditions[0]}
+
+        if any(isinstance(x, dict) for x in conditions):
+            return {'$or': [{attribute: x} for x in conditions]}
+
+        return {attribute: {'$in': conditions}}
+
+    def build(self, query_string, ignore_case=True):
+        """
+        Return a MongoDB filter for given query string
+        Returned filter can be extended by appending to it's "$and" list
+        """
+        cache_key = (self.collection_name, self.model_class, query_string, ignore_case)
+        query = self.query_cache.get(cache_key)
+        if query is None:
+            query = self.__build(query_string, ignore_case)
+            self.query_cache.set(cache_key, query)
+
+        # Parts are not modified, compiled regexes are immutable
+        return {'$and': list(query['$and'])}
+
+    def __build(self, query_string, ignore_case):
+        """
+        Parse query string into a MongoDB filter
+        """
+        query = [{'deleted': {'$ne': True}}]
+        for part in query_string.split('&&'):
+            if '=' not in part:
+                continue
+
+            attribute, value = part.split('=', 1)
+            query.append(self.build_part(attribute, value, ignore_case))
+
+        return {'$and': query}
+
+    def build_sort(self, sort_attr, sort_asc=True):
+        """
+        Return a list of sort keys for given attribute
+        Database id is always the last key, so order is deterministic
+        """
+        direction = 1 if sort_asc else -1
+        if not sort_attr:
+            return [('_id', direction)]
+
+        attribute, _ = self.get_attribute(sort_attr)
+        if attribute == '_id':
+            return [('_id', direction)]
+
+        return [(attribute, direction), ('_id', direction)]
+
+    @staticmethod
+    def build_seek(sort_keys, values):
+        """
+        Return a filter that selects objects that come after given values
+        of sort keys, i.e. keyset pagination
+        Sort keys must be scalar attributes, null and missing values are
+        sorted before all other values
+        """
+        alternatives = []
+        for index, (attribute, direction) in enumerate(sort_keys):
+            alternative = {key: value for (key, _), value in zip(sort_keys[:index], values)}
+            value = values[index]
+            if value is None:
+                if direction < 0:
+                    # Nothing comes after nulls in descending order
+                    continue
+
+                alternative[attribute] = {'$ne': None}
+            elif direction > 0 or attribute == '_id':
+                alternative[attribute] = {'$gt' if direction > 0 else '$lt': value}
+            else:
+                # Nulls come after all other values in descending order
+                condition = {'$or': [{attribute: {'$lt': value}}, {attribute: None}]}
+                alternative = {'$and': [alternative, condition]} if alternative else condition
+
+            alternatives.append(alternative)
+
+        if len(alternatives) == 1:
+            return alternatives[0]
+
+        return {'$or': alternatives}
+
+    @staticmethod
+    def get_value(obj, attribute):
+        """
+        Return value of dot separated attribute path, e.g. history.0.time
+        """
+        for key in attribute.split('.'):
+            if isinstance(obj, list):
+                obj = obj[int(key)] if key.isdigit() and int(key) < len(obj) else None
+            elif isinstance(obj, dict):
+                obj = obj.get(key)
+            else:
+                return None
+
+        return obj
@@ -10,6 +10,7 @@ from core_lib.utils.connection_wrapper import ConnectionWrapper
 from core_lib.utils.submitter import Submitter as BaseSubmitter
 from core_lib.utils.common_utils import clean_split, refresh_workflows_in_stats
 from core.utils.emailer import Emailer
+from core.utils.object_changes import ObjectChanges
 
 
 class RequestSubmitter(BaseSubmitter):
@@ -35,7 +36,8 @@ class RequestSubmitter(BaseSubmitter):
         request_db = Database('requests')
         request.set('status', 'new')
         request.add_history('submission', 'failed', 'automatic')
-        request_db.save(request.get_json())
+        request_db.save(request.get_json(copy=False))
+        ObjectChanges.saved('requests', request.get_json(copy=False))
         service_url = environment.SERVICE_URL
         emailer = Emailer()
         prepid = request.get_prepid()
@@ -108,7 +110,8 @@ class RequestSubmitter(BaseSubmitter):
         if not request.get('input')['dataset']:
             request_db = Database('requests')
             request.set('status', 'approved')
-            request_db.save(request.get_json())
+            request_db.save(request.get_json(copy=False))
+            ObjectChanges.saved('requests', request.get_json(copy=False))
             raise AssertionError('Cannot submit a request without input dataset')
 
     def generate_configs(self, request, ssh_executor, request_dir):
@@ -232,7 +235,8 @@ class RequestSubmitter(BaseSubmitter):
                     request.set('workflows', [{'name': workflow_name}])
                     request.set('status', 'submitted')
                     request.add_history('submission', 'succeeded', 'automatic')
-                    request_db.save(request.get_json())
+                    request_db.save(request.get_json(copy=False))
+                    ObjectChanges.saved('requests', request.get_json(copy=False))
                     time.sleep(3)
                     self.approve_workflow(workflow_name, connection)
 
@@ -252,6 +256,6 @@ class RequestSubmitter(BaseSubmitter):
             self.__handle_success(request)
 
         if not environment.DEVELOPMENT:
-            controller.update_workflows(request)
+            controller.refresh_workflows(prepid)
 
         self.logger.info('Successfully finished %s submission', prepid)
@@ -0,0 +1,65 @@
+"""
+Module that contains RunRanges class
+"""
+
+
+class RunRanges():
+    """
+    RunRanges converts lists of run numbers to compact inclusive ranges,
+    e.g. [1, 2, 3, 5] <-> [[1, 3], [5, 5]], and back
+    """
+
+    # Maximum number of runs that a list of runs and ranges can expand to
+    max_runs = 100000
+
+    @classmethod
+    def parse(cls, runs):
+        """
+        Return a sorted list of unique run numbers from a list of run numbers,
+        [first, last] pairs or "first-last" and "first..last" strings
+        Raise ValueError for reversed ranges and for more than max_runs runs
+        """
+        run_numbers = set()
+        for item in runs:
+            if isinstance(item, (list, tuple)):
+                first, last = item
+            elif isinstance(item, str) and ('-' in item or '..' in item):
+                first, last = item.replace('..', '-').split('-', 1)
+            else:
+                first = last = item
+
+            first, last = int(first), int(last)
+            if first > last:
+                raise ValueError(f'Bad run range {first}-{last}')
+
+            if last - first + 1 + len(run_numbers) > cls.max_runs:
+                raise ValueError(f'Too many runs, at most {cls.max_runs} are allowed')
+
+            run_numbers.update(range(first, last + 1))
+
+        return sorted(run_numbers)
+
+    @staticmethod
+    def compress(runs):
+        """
+        Return a list of [first, last] pairs of consecutive run numbers
+        """
+        ranges = []
+        for run in sorted(set(runs)):
+            if ranges and ranges[-1][1] + 1 == run:
+                ranges[-1][1] = run
+            else:
+                ranges.append([run, run])
+
+        return ranges
+
+    @staticmethod
+    def expand(ranges):
+        """
+        Return a list of run numbers from a list of [first, last] pairs
+        """
+        runs = []
+        for first, last in ranges:
+            runs.extend(range(first, last + 1))
+
+        return runs
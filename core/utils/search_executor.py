@@ -0,0 +1,68 @@
+"""
+Module that contains SearchExecutor class
+"""
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SearchExecutor():
+    """
+    SearchExecutor runs a batch of search attempts concurrently
+    Number of concurrent database queries is capped by a shared thread pool
+    Results are merged in the order of attempts, so output is deterministic,
+    and remaining attempts are cancelled as soon as enough results are collected
+    """
+
+    # Shared pool caps number of concurrent search queries in the whole process
+    __max_workers = 4
+    __pool = ThreadPoolExecutor(max_workers=__max_workers, thread_name_prefix='search')
+
+    def __init__(self, result_limit=20):
+        self.logger = logging.getLogger()
+        self.result_limit = result_limit
+
+    @staticmethod
+    def __timed(function):
+        """
+        Run a function and return it's result together with duration in ms
+        """
+        start = time.perf_counter()
+        result = function()
+        return result, (time.perf_counter() - start) * 1000
+
+    def run(self, attempts):
+        """
+        Run a list of (name, function) attempts
+        Each function must return a list of (key, value) pairs, values with
+        already seen keys are ignored
+        Return a list of unique values and a list of per-attempt timings
+        """
+        futures = [(name, self.__pool.submit(self.__timed, function))
+                   for name, function in attempts]
+        results = []
+        used_keys = set()
+        timings = []
+        for index, (name, future) in enumerate(futures):
+            pairs, duration = future.result()
+            timings.append({'attempt': name,
+                            'time_ms': round(duration, 2),
+                            'results': len(pairs)})
+            for key, value in pairs:
+                if key not in used_keys:
+                    used_keys.add(key)
+                    results.append(value)
+
+            if len(results) >= self.result_limit:
+                results = results[:self.result_limit]
+                # Attempts that did not start yet will not be executed
+                for skipped_name, skipped_future in futures[index + 1:]:
+                    skipped_future.cancel()
+                    timings.append({'attempt': skipped_name,
+                                    'time_ms': None,
+                                    'results': 0})
+
+                break
+
+        self.logger.debug('Search attempt timings: %s', timings)
+        return results, timings
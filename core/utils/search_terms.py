@@ -0,0 +1,222 @@
+"""
+Module that contains SearchTerms class
+"""
+import re
+import time
+import logging
+from pymongo import ASCENDING
+from core_lib.database.database import Database
+from core.utils.query_builder import QueryBuilder
+
+
+class SearchTerms():
+    """
+    SearchTerms maintains a materialized "search_terms" collection
+    Every searchable value of every object is stored as a separate small entry
+    (value, value_lower, database, attribute, prepid, updated), so wild search
+    can do indexed lookups instead of scanning whole objects
+    Search terms of a database are complete only after they were rebuilt,
+    which is recorded in "search_terms_state" collection
+    """
+
+    collection_name = 'search_terms'
+    state_collection_name = 'search_terms_state'
+    # Indexes used for lookup, refresh and maintenance
+    indexes = [[('database', ASCENDING), ('attribute', ASCENDING), ('value_lower', ASCENDING)],
+               [('database', ASCENDING), ('prepid', ASCENDING)],
+               [('database', ASCENDING), ('updated', ASCENDING)]]
+    # Database -> search attribute names -> attribute in search terms
+    search_attributes = {'subcampaigns': {'prepid': 'prepid'},
+                         'tickets': {'prepid': 'prepid',
+                                     'subcampaign': 'subcampaign',
+                                     'processing_string': 'processing_string',
+                                     'input': 'input'},
+                         'requests': {'prepid': 'prepid',
+                                      'subcampaign': 'subcampaign',
+                                      'processing_string': 'processing_string',
+                                      'input_dataset': 'input_dataset',
+                                      'input.dataset': 'input_dataset',
+                                      'output_dataset': 'output_dataset',
+                                      'output_datasets': 'output_dataset',
+                                      'workflow': 'workflow',
+                                      'workflows': 'workflow',
+                                      'workflows.name': 'workflow'}}
+
+    def __init__(self):
+        self.logger = logging.getLogger()
+        self.collection = Database(self.collection_name).collection
+
+    @staticmethod
+    def extract_terms(database_name, obj):
+        """
+        Return a set of (attribute, value) pairs of object JSON
+        """
+        terms = {('prepid', obj.get('prepid'))}
+        if database_name == 'tickets':
+            for step in obj.get('steps', []):
+                terms.add(('subcampaign', step.get('subcampaign')))
+                terms.add(('processing_string', step.get('processing_string')))
+
+            for input_item in obj.get('input', []):
+                terms.add(('input', input_item))
+
+        elif database_name == 'requests':
+            terms.add(('subcampaign', obj.get('subcampaign')))
+            terms.add(('processing_string', obj.get('processing_string')))
+            terms.add(('input_dataset', obj.get('input', {}).get('dataset')))
+            for dataset in obj.get('output_datasets', []):
+                terms.add(('output_dataset', dataset))
+
+            for workflow in obj.get('workflows', []):
+                terms.add(('workflow', workflow.get('name')))
+
+        return {(attribute, value) for attribute, value in terms if value}
+
+    def ensure_indexes(self):
+        """
+        Create indexes used for lookup, refresh and maintenance
+        """
+        for keys in self.indexes:
+            self.collection.create_index(keys)
+
+    def is_complete(self, database_name):
+        """
+        Return whether search terms of all objects of database were built and
+        are not being rebuilt
+        """
+        state = Database(self.state_collection_name).collection.find_one({'_id': database_name})
+        return bool(state and state.get('complete'))
+
+    def set_complete(self, database_name, complete):
+        """
+        Mark search terms of a database as complete or incomplete
+        """
+        Database(self.state_collection_name).collection.update_one(
+            {'_id': database_name},
+            {'$set': {'complete': complete, 'time': time.time()}},
+            upsert=True)
+
+    def update(self, database_name, obj):
+        """
+        Replace all search terms of given object JSON
+        New entries are inserted before old ones are deleted, so readers see
+        either old, new or both values, but never none of them
+        """
+        prepid = obj.get('prepid')
+        if not prepid:
+            return
+
+        updated = time.time()
+        entries = [{'value': value,
+                    'value_lower': value.lower(),
+                    'database': database_name,
+                    'attribute': attribute,
+                    'prepid': prepid,
+                    'updated': updated}
+                   for attribute, value in self.extract_terms(database_name, obj)]
+        if entries:
+            self.collection.insert_many(entries, ordered=False)
+
+        self.collection.delete_many({'database': database_name,
+                                     'prepid': prepid,
+                                     'updated': {'$lt': updated}})
+        self.logger.debug('Updated %s search terms of %s', len(entries), prepid)
+
+    def remove(self, database_name, prepid):
+        """
+        Remove all search terms of object with given prepid
+        """
+        self.collection.delete_many({'database': database_name, 'prepid': prepid})
+        self.logger.debug('Removed search terms of %s', prepid)
+
+    @staticmethod
+    def build_matcher(query):
+        """
+        Turn wildcard query into an anchored lowercase regex
+        Literal prefix before the first wildcard lets MongoDB use index bounds
+        """
+        parts = [re.escape(part) for part in query.lower().split('*')]
+        return re.compile('^' + '.*'.join(parts) + '$')
+
+    def find_prepids_by_prefix(self, database_name, attribute, query, limit=5000):
+        """
+        Return a set of prepids of objects that have a value starting with
+        given prefix, case insensitive
+        Lowercase values are an index-friendly shadow of object attributes, so
+        "starts with" queries are a range scan of the index
+        Return None if attribute is not in search terms, query is not a prefix
+        query, search terms of database are not complete (not rebuilt yet or
+        being rebuilt) or there are more than limit matching values
+        """
+        attribute = self.search_attributes.get(database_name, {}).get(attribute)
+        if not attribute:
+            return None
+
+        prefixes = [QueryBuilder.get_prefix(x.strip().lower()) for x in query.split(',')]
+        if not prefixes or None in prefixes:
+            return None
+
+        if not self.is_complete(database_name):
+            # Missing entries would hide matching objects
+            return None
+
+        prepids = set()
+        for prefix in prefixes:
+            entries = self.collection.find({'database': database_name,
+                                            'attribute': attribute,
+                                            'value_lower': QueryBuilder.prefix_range(prefix)},
+                                           {'prepid': 1, '_id': 0}).limit(limit + 1)
+            entries = list(entries)
+            if len(entries) > limit:
+                return None
+
+            prepids.update(x['prepid'] for x in entries)
+
+        return prepids
+
+    def search(self, database_name, attribute, query, limit=5):
+        """
+        Return a list of unique values of attribute that match wildcard query
+        Query must have a literal prefix, so it is a range scan of the index,
+        queries that start with a wildcard would scan all values of attribute
+        """
+        if query.startswith('*'):
+            raise ValueError(f'Query {query} does not have a literal prefix')
+
+        return self.__get_values(database_name, attribute, self.build_matcher(query), limit)
+
+    def get_values(self, database_name, attribute, values_lower, limit=5):
+        """
+        Return a list of unique values of attribute whose lowercase value is
+        one of given values
+        """
+        return self.__get_values(database_name, attribute, {'$in': list(values_lower)}, limit)
+
+    def __get_values(self, database_name, attribute, value_lower, limit):
+        """
+        Return a list of unique values of attribute that match value_lower condition
+        """
+        results = self.collection.aggregate([{'$match': {'database': database_name,
+                                                         'attribute': attribute,
+                                                         'value_lower': value_lower}},
+                                             {'$group': {'_id': '$value'}},
+                                             {'$sort': {'_id': 1}},
+                                             {'$limit': limit}])
+        return [x['_id'] for x in results]
+
+    def rebuild(self, database_names=('subcampaigns', 'tickets', 'requests')):
+        """
+        Drop and rebuild search terms for all objects in given databases
+        """
+        self.ensure_indexes()
+        for database_name in database_names:
+            self.set_complete(database_name, False)
+            self.collection.delete_many({'database': database_name})
+            database = Database(database_name)
+            count = 0
+            for obj in database.collection.find({'deleted': {'$ne': True}}):
+                self.update(database_name, obj)
+                count += 1
+
+            self.set_complete(database_name, True)
+            self.logger.info('Rebuilt search terms of %s %s', count, database_name)
@@ -0,0 +1,275 @@
+"""
+Module that contains SlowQueryLog class
+"""
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from bson import json_util
+from flask import has_request_context, request
+from pymongo import monitoring
+from core_lib.database.database import Database
+from core.utils.lru_cache import LRUCache
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    """
+    SlowQueryLog is a MongoDB command listener that times every database
+    command of this process, including the ones made by core_lib Database
+    Commands that take longer than a threshold are stored, together with
+    their query shape, calling endpoint and explain plan, in a capped
+    "slow_queries" collection
+    Explain and store are done in a background thread, so requests are not
+    slowed down by logging
+    Explain runs the query again with "executionStats" verbosity to get
+    numbers of examined keys and documents, at most once per
+    execution_stats_interval seconds and once per query shape in plans cache,
+    other explains use "queryPlanner" verbosity that does not run the query
+    Pending commands are kept in a dictionary without a lock (single
+    operations are atomic), only counters are updated under the lock
+    """
+
+    collection_name = 'slow_queries'
+    # Capped collection size in bytes
+    collection_size = 16 * 1024 * 1024
+    threshold_ms = 100
+    # Minimum number of seconds between explains that run the query
+    execution_stats_interval = 60
+    # Commands that can be explained
+    explained_commands = {'find', 'aggregate', 'count', 'distinct'}
+    # Commands that are not timed at all
+    ignored_commands = {'explain', 'getMore', 'killCursors', 'endSessions',
+                        'hello', 'isMaster', 'ismaster', 'ping', 'buildInfo',
+                        'saslStart', 'saslContinue', 'authenticate', 'getnonce'}
+    # Fields of a command that must not be sent with explain
+    session_fields = {'lsid', 'txnNumber', '$clusterTime', '$db', '$readPreference',
+                      'readConcern', 'writeConcern', 'autocommit', 'startTransaction'}
+    __instance = None
+
+    def __init__(self):
+        self.logger = logging.getLogger()
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.stats = {}
+        # Time of the last explain with execution stats
+        self.execution_stats_at = 0
+        # Reuse explain plans of recently logged query shapes
+        self.plans = LRUCache(max_size=500, timeout=600)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='slow_query')
+        # Capped collection is created by the logging thread before first insert
+        self.collection_ready = False
+
+    @classmethod
+    def register(cls):
+        """
+        Register the listener for all MongoDB clients that are created after this
+        """
+        if cls.__instance is None:
+            cls.__instance = SlowQueryLog()
+            monitoring.register(cls.__instance)
+
+        return cls.__instance
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Return registered listener or None
+        """
+        return cls.__instance
+
+    def ensure_collection(self):
+        """
+        Create capped collection for slow queries if it does not exist
+        """
+        if self.collection_ready:
+            return
+
+        database = Database(self.collection_name).collection.database
+        if self.collection_name not in database.list_collection_names():
+            database.create_collection(self.collection_name,
+                                       capped=True,
+                                       size=self.collection_size)
+
+        self.collection_ready = True
+
+    @staticmethod
+    def get_shape(value):
+        """
+        Return query with all values replaced by their type names
+        """
+        if isinstance(value, dict):
+            return {k: SlowQueryLog.get_shape(v) for k, v in value.items()}
+
+        if isinstance(value, (list, tuple)):
+            # Lists of values, e.g. $in, are shown as a single value
+            if not any(isinstance(v, (dict, list, tuple)) for v in value):
+                value = value[:1]
+
+            return [SlowQueryLog.get_shape(v) for v in value]
+
+        return type(value).__name__
+
+    @staticmethod
+    def get_collection_name(command_name, command):
+        """
+        Return name of collection that command was run on
+        """
+        collection_name = command.get(command_name)
+        return collection_name if isinstance(collection_name, str) else ''
+
+    @staticmethod
+    def get_endpoint():
+        """
+        Return endpoint of current flask request or name of current thread
+        """
+        if has_request_context():
+            return f'{request.method} {request.path}'
+
+        return threading.current_thread().name
+
+    def started(self, event):
+        if event.command_name in self.ignored_commands:
+            return
+
+        command = event.command
+        collection_name = self.get_collection_name(event.command_name, command)
+        if collection_name == self.collection_name:
+            return
+
+        key = (event.connection_id, event.request_id)
+        self.pending[key] = (event.database_name,
+                             collection_name,
+                             command,
+                             self.get_endpoint())
+
+    def succeeded(self, event):
+        self.__finished(event)
+
+    def failed(self, event):
+        self.__finished(event)
+
+    def __finished(self, event):
+        """
+        Update counters and log the command if it was slow
+        """
+        pending = self.pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+
+        database_name, collection_name, command, endpoint = pending
+        duration_ms = event.duration_micros / 1000
+        stats_key = f'{collection_name or database_name}.{event.command_name}'
+        slow = duration_ms >= self.threshold_ms
+        with self.lock:
+            stats = self.stats.setdefault(stats_key, {'count': 0, 'slow': 0,
+                                                      'total_ms': 0.0, 'max_ms': 0.0})
+            stats['count'] += 1
+            stats['slow'] += int(slow)
+            stats['total_ms'] += duration_ms
+            stats['max_ms'] = max(stats['max_ms'], duration_ms)
+
+        if not slow:
+            return
+
+        entry = {'time': int(time.time()),
+                 'duration_ms': round(duration_ms, 2),
+                 'database': database_name,
+                 'collection': collection_name,
+                 'command': event.command_name,
+                 'endpoint': endpoint,
+                 'failed': isinstance(event, monitoring.CommandFailedEvent)}
+        self.executor.submit(self.__log, entry, command)
+
+    def __log(self, entry, command):
+        """
+        Explain and store a slow command
+        """
+        try:
+            shape = {k: self.get_shape(v) for k, v in command.items()
+                     if k not in self.session_fields}
+            entry['shape'] = json_util.dumps(shape, sort_keys=True)
+            entry['plan'] = self.__get_plan(entry, command)
+            self.ensure_collection()
+            Database(self.collection_name).collection.insert_one(entry)
+            self.logger.info('Slow query %.2fms %s.%s in %s: %s',
+                             entry['duration_ms'],
+                             entry['collection'],
+                             entry['command'],
+                             entry['endpoint'],
+                             entry['plan'])
+        except Exception as ex:
+            self.logger.error('Error logging slow query: %s', ex)
+
+    def __get_plan(self, entry, command):
+        """
+        Return summary of explain plan of a command or None if it cannot be explained
+        """
+        if entry['command'] not in self.explained_commands:
+            return None
+
+        pipeline = command.get('pipeline', [])
+        if any('$out' in stage or '$merge' in stage for stage in pipeline):
+            return None
+
+        plan_key = (entry['database'], entry['shape'])
+        plan = self.plans.get(plan_key)
+        if plan is not None:
+            return plan
+
+        explained = {k: v for k, v in command.items() if k not in self.session_fields}
+        database = Database(self.collection_name).collection.database.client[entry['database']]
+        verbosity = 'queryPlanner'
+        now = time.time()
+        if now - self.execution_stats_at >= self.execution_stats_interval:
+            # Only the logging thread explains, so this needs no lock
+            self.execution_stats_at = now
+            verbosity = 'executionStats'
+
+        explain = database.command({'explain': explained, 'verbosity': verbosity})
+        plan = self.summarize_explain(explain)
+        self.plans.set(plan_key, plan)
+        return plan
+
+    @staticmethod
+    def summarize_explain(explain):
+        """
+        Return stages and used indexes of explain output of find, aggregate,
+        count or distinct, numbers of examined keys and documents are added
+        if explain has execution stats
+        """
+        plan = {'stages': [], 'indexes': []}
+
+        def walk(value, in_plan):
+            if isinstance(value, list):
+                for item in value:
+                    walk(item, in_plan)
+
+            if not isinstance(value, dict):
+                return
+
+            if in_plan:
+                if value.get('stage') and value['stage'] not in plan['stages']:
+                    plan['stages'].append(value['stage'])
+
+                if value.get('indexName') and value['indexName'] not in plan['indexes']:
+                    plan['indexes'].append(value['indexName'])
+
+            for key, item in value.items():
+                if key == 'executionStats' and isinstance(item, dict):
+                    plan['keys_examined'] = (plan.get('keys_examined', 0)
+                                             + item.get('totalKeysExamined', 0))
+                    plan['docs_examined'] = (plan.get('docs_examined', 0)
+                                             + item.get('totalDocsExamined', 0))
+                elif key != 'rejectedPlans':
+                    walk(item, in_plan or key == 'winningPlan')
+
+        walk(explain, False)
+        return plan
+
+    def get_stats(self):
+        """
+        Return number of commands and their total and max durations
+        """
+        with self.lock:
+            return {k: dict(v, total_ms=round(v['total_ms'], 2), max_ms=round(v['max_ms'], 2))
+                    for k, v in sorted(self.stats.items())}
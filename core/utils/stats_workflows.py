@@ -0,0 +1,134 @@
+"""
+Module that contains StatsWorkflows class
+"""
+import json
+import logging
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from core_lib.database.database import Database
+from core_lib.utils.common_utils import (get_workflows_from_stats,
+                                         get_workflows_from_stats_for_prepid)
+
+
+class StatsWorkflows():
+    """
+    StatsWorkflows fetches computing workflows of requests from Stats2
+    Workflows of many requests are looked up by prepids in parallel and
+    workflows that were not found by prepid are fetched by name in batches
+    """
+
+    # Number of parallel Stats2 lookups by prepid
+    threads = 8
+    # Number of workflow names fetched from Stats2 in one call
+    batch_size = 100
+
+    def __init__(self):
+        self.logger = logging.getLogger()
+
+    def get_for_prepid(self, prepid):
+        """
+        Return a list of Stats2 workflows of a prepid or None if they could
+        not be fetched
+        """
+        try:
+            return get_workflows_from_stats_for_prepid(prepid)
+        except Exception as ex:
+            self.logger.error('Error getting %s workflows from Stats2: %s', prepid, ex)
+            return None
+
+    def get_many(self, prepids):
+        """
+        Fetch Stats2 workflows of multiple requests at once
+        Return a dictionary of prepids and lists of their workflows
+        Prepids whose workflows could not be fetched are left out, so they
+        can be fetched again separately
+        """
+        prepids = list(dict.fromkeys(prepids))
+        if not prepids:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(self.threads, len(prepids))) as executor:
+            stats_workflows = dict(zip(prepids, executor.map(self.get_for_prepid, prepids)))
+
+        stats_workflows = {p: w for p, w in stats_workflows.items() if w is not None}
+        requests = Database('requests').collection.find({'prepid': {'$in': prepids}},
+                                                        {'_id': 0,
+                                                         'prepid': 1,
+                                                         'workflows.name': 1})
+        missing_names = {}
+        for request_json in requests:
+            prepid = request_json['prepid']
+            if prepid not in stats_workflows:
+                continue
+
+            found_names = {(w or {}).get('RequestName') for w in stats_workflows[prepid]}
+            for workflow in request_json.get('workflows', []):
+                if workflow['name'] not in found_names:
+                    missing_names.setdefault(workflow['name'], []).append(prepid)
+
+        self.logger.info('%s workflows of %s requests that are not in stats by prepid',
+                         len(missing_names),
+                         len(prepids))
+        missing_names = list(missing_names.items())
+        for start in range(0, len(missing_names), self.batch_size):
+            batch = dict(missing_names[start:start + self.batch_size])
+            try:
+                workflows = get_workflows_from_stats(list(batch))
+            except Exception as ex:
+                self.logger.error('Error getting %s workflows from Stats2: %s', len(batch), ex)
+                for batch_prepids in batch.values():
+                    for prepid in batch_prepids:
+                        stats_workflows.pop(prepid, None)
+
+                continue
+
+            for workflow in workflows:
+                for prepid in batch.get((workflow or {}).get('RequestName'), []):
+                    if prepid in stats_workflows:
+                        stats_workflows[prepid].append(workflow)
+
+        return stats_workflows
+
+    def get_all(self, prepid, workflow_names, stats_workflows=None):
+        """
+        Return a dictionary of names and Stats2 workflows of a request
+        Workflows that were already fetched can be given as stats_workflows,
+        otherwise they are fetched by prepid, given workflow names that are
+        not among them are fetched by name
+        """
+        if stats_workflows is None:
+            stats_workflows = get_workflows_from_stats_for_prepid(prepid)
+        else:
+            stats_workflows = list(stats_workflows)
+
+        missing_names = set(workflow_names)
+        missing_names -= {(w or {}).get('RequestName') for w in stats_workflows}
+        self.logger.info('%s workflows that are not in stats: %s',
+                         len(missing_names),
+                         missing_names)
+        if missing_names:
+            stats_workflows += get_workflows_from_stats(list(missing_names))
+
+        all_workflows = {}
+        for workflow in stats_workflows:
+            if not workflow or not workflow.get('RequestName'):
+                raise RuntimeError('Could not find workflow in Stats2')
+
+            name = workflow.get('RequestName')
+            all_workflows[name] = workflow
+            self.logger.info('Found workflow %s for %s', name, prepid)
+
+        return all_workflows
+
+    @staticmethod
+    def get_revision(workflow):
+        """
+        Return a revision of Stats2 workflow document that changes whenever
+        the document changes: CouchDB revision, last update time or a hash
+        """
+        for attribute in ('_rev', 'LastUpdate'):
+            if workflow.get(attribute):
+                return str(workflow[attribute])
+
+        workflow_json = json.dumps(workflow, sort_keys=True, default=str)
+        return hashlib.md5(workflow_json.encode('utf-8')).hexdigest()
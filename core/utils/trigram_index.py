@@ -0,0 +1,318 @@
+"""
+Module that contains TrigramIndex class
+"""
+import re
+import time
+import heapq
+import logging
+from threading import RLock, Thread
+from core.utils.search_terms import SearchTerms
+from core.utils.prepid_index import PrepidIndex
+
+
+class TrigramIndex():
+    """
+    TrigramIndex is an in-memory trigram index of searchable strings, such as
+    dataset and workflow names, of a single database
+    It is built from the "search_terms" collection in a background thread and
+    refreshed from entries whose "updated" time is newer than the newest
+    "updated" time seen so far (minus an overlap for late writes), so it sees
+    changes made by other processes within refresh_interval seconds, changes
+    made by this process are added immediately
+    "updated" is set by the writing process, so refresh compares it only to
+    values written by other processes and not to the clock of this process,
+    clocks of processes that write search terms are assumed to differ by less
+    than refresh_overlap seconds, otherwise some changes are seen only after
+    the next full reload
+    Lookup returns a superset of matching prepids that is used to narrow down
+    the database query, actual matching is still done by the database, or
+    matching values for wild search queries that start with a wildcard
+    Index is not used while it is loading, if search terms are not complete
+    (not rebuilt yet or being rebuilt) or if it could not be refreshed, so
+    search falls back to the plain query when index might be stale
+    """
+
+    __indexes = {}
+    __indexes_lock = RLock()
+    # Database -> search attribute names -> attribute in search terms
+    indexed_attributes = {'requests': {'subcampaign': 'subcampaign',
+                                       'processing_string': 'processing_string',
+                                       'input_dataset': 'input_dataset',
+                                       'input.dataset': 'input_dataset',
+                                       'output_dataset': 'output_dataset',
+                                       'output_datasets': 'output_dataset',
+                                       'workflow': 'workflow',
+                                       'workflows': 'workflow',
+                                       'workflows.name': 'workflow'},
+                          'tickets': {'subcampaign': 'subcampaign',
+                                      'processing_string': 'processing_string',
+                                      'input': 'input'}}
+    # Do not use the index if it does not narrow down the query enough
+    max_candidates = 5000
+    # Full reload drops values that were removed or changed since
+    reload_interval = 3600
+    # Seconds between refreshes
+    refresh_interval = 2
+    # Refresh also fetches entries that were updated this many seconds before
+    # the newest fetched entry, in case they were written late or by a process
+    # whose clock is behind
+    refresh_overlap = 60
+    # Do not use the index if it was not refreshed for this many seconds
+    max_staleness = 30
+
+    def __init__(self, database_name):
+        self.logger = logging.getLogger()
+        self.database_name = database_name
+        self.attributes = sorted(set(self.indexed_attributes[database_name].values()))
+        self.lock = RLock()
+        self.values = {}
+        self.postings = {}
+        self.loaded_at = 0
+        self.loading = False
+        self.loaded = False
+        # Time of the last refresh and whether search terms were complete then
+        self.refreshed_at = 0
+        # Newest "updated" time of fetched entries
+        self.updated_until = 0
+        self.refreshing = False
+        self.complete = False
+
+    @classmethod
+    def get_index(cls, database_name):
+        """
+        Return index of given database or None if database is not indexed
+        Start a reload or refresh if it is needed
+        """
+        if database_name not in cls.indexed_attributes:
+            return None
+
+        with cls.__indexes_lock:
+            index = cls.__indexes.get(database_name)
+            if index is None:
+                index = TrigramIndex(database_name)
+                cls.__indexes[database_name] = index
+
+        now = time.time()
+        with index.lock:
+            reload = not index.loading and now - index.loaded_at > cls.reload_interval
+            if reload:
+                index.loading = True
+
+        if reload:
+            Thread(target=index.load,
+                   name=f'{database_name}-trigram-index',
+                   daemon=True).start()
+        elif index.loaded and now - index.refreshed_at > cls.refresh_interval:
+            index.refresh()
+
+        return index
+
+    @classmethod
+    def object_changed(cls, database_name, obj_json, _prepid):
+        """
+        Add values of a saved object to the index of this process
+        Values of deleted objects are dropped by the next full reload
+        """
+        index = cls.__indexes.get(database_name)
+        if index is None or obj_json is None:
+            return
+
+        attributes = set(index.attributes)
+        with index.lock:
+            for attribute, value in SearchTerms.extract_terms(database_name, obj_json):
+                if attribute in attributes:
+                    index.add_entry({'attribute': attribute,
+                                     'value_lower': value.lower(),
+                                     'prepid': obj_json['prepid']})
+
+    def is_usable(self):
+        """
+        Return whether index is loaded, search terms are complete and
+        index was refreshed recently
+        """
+        return (self.loaded
+                and self.complete
+                and time.time() - self.refreshed_at < self.max_staleness)
+
+    def add_entry(self, entry):
+        """
+        Add a single search terms entry to the index
+        """
+        attribute = entry['attribute']
+        value = entry['value_lower']
+        prepids = self.values.setdefault(attribute, {}).setdefault(value, set())
+        if not prepids:
+            postings = self.postings.setdefault(attribute, {})
+            for ngram in PrepidIndex.ngrams(value):
+                postings.setdefault(ngram, set()).add(value)
+
+        prepids.add(entry['prepid'])
+
+    def __fetch(self, search_terms, query):
+        """
+        Return search terms entries of this database that match the query
+        """
+        query['database'] = self.database_name
+        query['attribute'] = {'$in': self.attributes}
+        projection = {'_id': 0, 'attribute': 1, 'value_lower': 1, 'prepid': 1, 'updated': 1}
+        return search_terms.collection.find(query, projection)
+
+    def load(self):
+        """
+        Load all values from search terms collection
+        Values are collected without holding the lock and swapped in at the end
+        """
+        start = time.time()
+        index = TrigramIndex(self.database_name)
+        try:
+            search_terms = SearchTerms()
+            complete = search_terms.is_complete(self.database_name)
+            count = 0
+            for entry in self.__fetch(search_terms, {}):
+                index.add_entry(entry)
+                index.updated_until = max(index.updated_until, entry.get('updated', 0))
+                count += 1
+
+        except Exception as ex:
+            self.logger.error('Error loading %s trigram index: %s', self.database_name, ex)
+            with self.lock:
+                # Try again after a while
+                self.loading = False
+                self.loaded_at = time.time()
+
+            return
+
+        with self.lock:
+            self.values = index.values
+            self.postings = index.postings
+            self.updated_until = index.updated_until
+            self.complete = complete
+            self.loaded = True
+            self.loading = False
+            self.loaded_at = start
+            # Entries written during the load are fetched by the next refresh
+            self.refreshed_at = start
+            self.refreshing = False
+
+        self.logger.info('Loaded %s %s search terms to trigram index in %.2fs',
+                         count,
+                         self.database_name,
+                         time.time() - start)
+
+    def refresh(self):
+        """
+        Add search terms entries that were updated since last refresh
+        """
+        with self.lock:
+            refreshed_at = self.refreshed_at
+            updated_until = self.updated_until
+            if self.refreshing or time.time() - refreshed_at <= self.refresh_interval:
+                # Other thread is refreshing or refreshed the index
+                return
+
+            self.refreshing = True
+
+        start = time.time()
+        try:
+            search_terms = SearchTerms()
+            complete = search_terms.is_complete(self.database_name)
+            query = {'updated': {'$gte': updated_until - self.refresh_overlap}}
+            entries = list(self.__fetch(search_terms, query))
+        except Exception as ex:
+            # Index becomes unusable when it gets too old
+            self.logger.error('Error refreshing %s trigram index: %s', self.database_name, ex)
+            with self.lock:
+                self.refreshing = False
+
+            return
+
+        with self.lock:
+            for entry in entries:
+                self.add_entry(entry)
+
+            self.complete = complete
+            self.refreshing = False
+            if self.refreshed_at == refreshed_at:
+                # Index was not reloaded in the meantime
+                self.refreshed_at = start
+                for entry in entries:
+                    self.updated_until = max(self.updated_until, entry.get('updated', 0))
+
+        self.logger.debug('Refreshed %s %s search terms in trigram index',
+                          len(entries),
+                          self.database_name)
+
+    def find_prepids(self, attribute, query):
+        """
+        Return a set of prepids that might match the wildcard query
+        Return None if index cannot be used for this attribute or query
+        """
+        attribute = self.indexed_attributes[self.database_name].get(attribute)
+        if not attribute or '*' not in query or not self.is_usable():
+            return None
+
+        prepids = set()
+        # Comma separated values are alternatives
+        for alternative in query.split(','):
+            alternative_prepids = self.__find_prepids(attribute, alternative.strip())
+            if alternative_prepids is None:
+                return None
+
+            prepids |= alternative_prepids
+            if len(prepids) > self.max_candidates:
+                return None
+
+        return prepids
+
+    def find_values(self, attribute, query, limit=5):
+        """
+        Return up to limit smallest lowercase values that match the wildcard query
+        Return None if index cannot be used for this attribute or query
+        """
+        attribute = self.indexed_attributes[self.database_name].get(attribute)
+        if not attribute or not self.is_usable():
+            return None
+
+        values = self.__find_values(attribute, query)
+        if values is None:
+            return None
+
+        matcher = SearchTerms.build_matcher(query)
+        return heapq.nsmallest(limit, (x for x in values if matcher.match(x)))
+
+    def __find_prepids(self, attribute, query):
+        """
+        Return a set of prepids of values that have all fragments of the query
+        """
+        values = self.__find_values(attribute, query)
+        if values is None:
+            return None
+
+        with self.lock:
+            attribute_values = self.values.get(attribute, {})
+            prepids = set()
+            for value in values:
+                prepids |= attribute_values.get(value, set())
+
+        return prepids
+
+    def __find_values(self, attribute, query):
+        """
+        Return a set of values that have all fragments of the query in the same
+        order or None if query does not have any trigrams
+        """
+        fragments = [x for x in query.lower().split('*') if x]
+        ngrams = set()
+        for fragment in fragments:
+            ngrams |= PrepidIndex.ngrams(fragment)
+
+        if not ngrams:
+            return None
+
+        matcher = re.compile('.*'.join(re.escape(x) for x in fragments))
+        with self.lock:
+            attribute_postings = self.postings.get(attribute, {})
+            postings = sorted((attribute_postings.get(n, set()) for n in ngrams), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+
+        return {x for x in candidates if matcher.search(x)}
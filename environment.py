@@ -40,6 +40,9 @@ Attributes:
     APPLICATION_CLIENT_ID (str): This is ID for target application (audience),
         registered in CERN Application Portal, that handles OIDC authentication flow 
         for PdmV applications or this application.
+    BULK_THREADS (int): Maximum number of requests that are processed in parallel
+        in bulk actions, like next status, option reset or update from Stats2.
+        Default value: 4
 """
 import os
 import inspect
@@ -67,6 +70,7 @@ CALLBACK_CLIENT_ID: str = os.getenv("CALLBACK_CLIENT_ID", "")
 CALLBACK_CLIENT_SECRET: str = os.getenv("CALLBACK_CLIENT_SECRET", "")
 APPLICATION_CLIENT_ID: str = os.getenv("APPLICATION_CLIENT_ID", "")
 SECRET_KEY: str = os.getenv("SECRET_KEY", "")
+BULK_THREADS: int = int(os.getenv("BULK_THREADS", "4"))
 
 # Raise an error if they are empty variables
 missing_environment_variables: dict[str, str] = {
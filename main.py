@@ -16,6 +16,9 @@ import environment
 from core_lib.database.database import Database
 from core_lib.utils.username_filter import UsernameFilter
 from core_lib.middlewares.auth import AuthenticationMiddleware
+from core.utils.index_manager import IndexManager
+from core.utils.query_builder import QueryBuilder, SEARCH_RENAMES
+from core.utils.slow_query_log import SlowQueryLog
 from api.subcampaign_api import (
     CreateSubcampaignAPI,
     DeleteSubcampaignAPI,
@@ -51,7 +54,7 @@ from api.request_api import (
     UpdateRequestWorkflowsAPI,
     RequestOptionResetAPI,
 )
-from api.search_api import SearchAPI, SuggestionsAPI, WildSearchAPI
+from api.search_api import SearchAPI, SearchExportAPI, SuggestionsAPI, WildSearchAPI
 from api.settings_api import SettingsAPI
 from api.system_api import (
     SubmissionWorkerStatusAPI,
@@ -61,6 +64,8 @@ from api.system_api import (
     ObjectsInfoAPI,
     BuildInfoAPI,
     UptimeInfoAPI,
+    CacheStatsAPI,
+    SlowQueriesAPI,
 )
 
 
@@ -186,6 +191,7 @@ def api_documentation(_path):
 
 
 api.add_resource(SearchAPI, "/api/search")
+api.add_resource(SearchExportAPI, "/api/search/export")
 api.add_resource(SuggestionsAPI, "/api/suggestions")
 api.add_resource(WildSearchAPI, "/api/wild_search")
 
@@ -198,6 +204,8 @@ api.add_resource(UserInfoAPI, "/api/system/user_info")
 api.add_resource(ObjectsInfoAPI, "/api/system/objects_info")
 api.add_resource(BuildInfoAPI, "/api/system/build_info")
 api.add_resource(UptimeInfoAPI, "/api/system/uptime")
+api.add_resource(CacheStatsAPI, "/api/system/cache_stats")
+api.add_resource(SlowQueriesAPI, "/api/system/slow_queries")
 
 api.add_resource(CreateSubcampaignAPI, "/api/subcampaigns/create")
 api.add_resource(DeleteSubcampaignAPI, "/api/subcampaigns/delete")
@@ -262,25 +270,18 @@ Database.set_credentials(
     username=environment.MONGO_DB_USERNAME, password=environment.MONGO_DB_PASSWORD
 )
 Database.set_database_name("rereco")
-Database.add_search_rename("requests", "runs", "runs<int>")
-Database.add_search_rename("requests", "run", "runs<int>")
-Database.add_search_rename("requests", "workflows", "workflows.name")
-Database.add_search_rename("requests", "workflow", "workflows.name")
-Database.add_search_rename("requests", "output_dataset", "output_datasets")
-Database.add_search_rename("requests", "input_dataset", "input.dataset")
-Database.add_search_rename("requests", "input_request", "input.request")
-Database.add_search_rename("requests", "created_on", "history.0.time")
-Database.add_search_rename("requests", "created_by", "history.0.user")
-Database.add_search_rename("subcampaigns", "created_on", "history.0.time")
-Database.add_search_rename("subcampaigns", "created_by", "history.0.user")
-Database.add_search_rename("tickets", "created_on", "history.0.time")
-Database.add_search_rename("tickets", "created_by", "history.0.user")
-Database.add_search_rename("tickets", "subcampaign", "steps.subcampaign")
-Database.add_search_rename("tickets", "processing_string", "steps.processing_string")
+# Time all database commands, must be registered before first database client is created
+SlowQueryLog.register()
+for rename in SEARCH_RENAMES:
+    Database.add_search_rename(*rename)
+    QueryBuilder.add_search_rename(*rename)
 
 # Set logger
 setup_logging(debug=environment.DEBUG, log_folder_path=environment.LOG_FOLDER)
 
+# Create missing indexes at import, so that it is also done when served by gunicorn
+IndexManager().check_all_in_background(create=True)
+
 
 def main():
     """
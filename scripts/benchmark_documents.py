@@ -0,0 +1,75 @@
+"""
+Module with sample documents and timing helper for model benchmark scripts
+Documents are shaped like large real requests, so benchmarks do not need
+a database
+"""
+import random
+import timeit
+
+
+def get_sequence_json():
+    """
+    Return JSON of a typical ReReco sequence
+    """
+    return {'conditions': '124X_dataRun3_v15',
+            'config_id': 'ab12',
+            'customise': 'Configuration/DataProcessing/Utils.addMonitoring',
+            'datatier': ['AOD', 'MINIAOD'],
+            'era': 'Run3',
+            'eventcontent': ['AOD', 'MINIAOD'],
+            'extra': '',
+            'gpu': {'requires': 'forbidden'},
+            'harvesting_config_id': '',
+            'nThreads': 8,
+            'scenario': 'pp',
+            'step': ['RAW2DIGI', 'L1Reco', 'RECO', 'PAT', 'DQM']}
+
+
+def get_request_json(runs=500, sequences=2, workflows=5, history=20, number=1):
+    """
+    Return JSON of a request with given number of runs (each with lumisection
+    ranges), sequences, workflows and history entries
+    """
+    generator = random.Random(number)
+    prepid = f'ReReco-Run2022C-ZeroBias-PromptNanoAODv10-{number:05d}'
+    run_numbers = list(range(355100, 355100 + runs))
+    statuses = ['new', 'assignment-approved', 'assigned', 'running-open',
+                'running-closed', 'completed', 'closed-out', 'announced']
+    output_dataset = '/ZeroBias/Run2022C-PromptNanoAODv10-v1/NANOAOD'
+    return {'_id': prepid,
+            'prepid': prepid,
+            'cmssw_release': 'CMSSW_12_4_8',
+            'completed_events': 1000000,
+            'energy': 13.6,
+            'history': [{'action': 'update', 'time': 1660000000 + i, 'user': 'pdmvserv'}
+                        for i in range(history)],
+            'input': {'dataset': '/ZeroBias/Run2022C-PromptReco-v1/MINIAOD',
+                      'request': ''},
+            'lumisections': {str(run): [[1, 50], [52, 300], [310, generator.randint(400, 2000)]]
+                             for run in run_numbers},
+            'memory': 16000,
+            'output_datasets': [output_dataset],
+            'priority': 110000,
+            'processing_string': 'PromptNanoAODv10',
+            'runs': run_numbers,
+            'sequences': [get_sequence_json() for _ in range(sequences)],
+            'size_per_event': [1.0],
+            'status': 'done',
+            'subcampaign': 'Run2022C-PromptNanoAODv10',
+            'time_per_event': [1.0],
+            'total_events': 1000000,
+            'workflows': [{'name': f'pdmvserv_Run2022C_ZeroBias_{i}',
+                           'type': 'TaskChain',
+                           'output_datasets': [{'name': output_dataset,
+                                                'type': 'VALID',
+                                                'events': 1000000}],
+                           'status_history': [{'status': status, 'time': 1660000000}
+                                              for status in statuses]}
+                          for i in range(workflows)]}
+
+
+def best_time(function, number, repeat=3):
+    """
+    Return best average time of a call in microseconds out of repeat runs
+    """
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number * 1000000
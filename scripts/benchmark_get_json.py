@@ -0,0 +1,39 @@
+"""
+Script that compares deep copying and copy-free get_json of a large request,
+with and without JSON serialization
+It does not need a database
+"""
+import sys
+import os
+import json
+import argparse
+# pylint: disable-next=wrong-import-position
+sys.path.append(os.path.abspath(os.path.pardir))
+from benchmark_documents import get_request_json, best_time
+from core.model.request import Request
+
+
+def main():
+    """
+    Get JSON of the same request with and without copying
+    """
+    parser = argparse.ArgumentParser(description='Benchmark get_json')
+    parser.add_argument('--runs', help='Number of runs in request', type=int, default=500)
+    parser.add_argument('--repeat', help='Number of repetitions', type=int, default=300)
+    args = vars(parser.parse_args())
+    request = Request(json_input=get_request_json(runs=args['runs']))
+    if request.get_json() != request.get_json(copy=False):
+        print('Copied and copy-free JSON differ!')
+
+    results = [
+        ('get_json', request.get_json),
+        ('get_json(copy=False)', lambda: request.get_json(copy=False)),
+        ('get_json + dumps', lambda: json.dumps(request.get_json())),
+        ('get_json(copy=False) + dumps', lambda: json.dumps(request.get_json(copy=False))),
+    ]
+    for name, function in results:
+        print(f'{name:30} {best_time(function, args["repeat"]) / 1000:.3f}ms')
+
+
+if __name__ == '__main__':
+    main()
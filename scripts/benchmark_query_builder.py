@@ -0,0 +1,63 @@
+"""
+Script that compares building search filters with and without compiled
+query cache of QueryBuilder
+It does not need a database
+"""
+import sys
+import os
+import time
+import argparse
+# pylint: disable-next=wrong-import-position
+sys.path.append(os.path.abspath(os.path.pardir))
+from core.model.request import Request
+from core.utils.query_builder import QueryBuilder, SEARCH_RENAMES
+
+
+# Typical queries of requests dashboard
+QUERIES = ['status=submitted',
+           'processing_string=*PromptNanoAOD*',
+           'prepid=ReReco-Run2022C*&&subcampaign=Run2022C-PromptNanoAODv10',
+           'workflows=*ZeroBias*&&runs=355100..356000']
+
+
+def measure(function, repeat):
+    """
+    Return average time of a call in microseconds
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+
+    return (time.perf_counter() - start) / repeat * 1000000
+
+
+def main():
+    """
+    Build the same queries with an empty and with a warm cache
+    """
+    parser = argparse.ArgumentParser(description='Benchmark query builder cache')
+    parser.add_argument('--repeat', help='Number of repetitions', type=int, default=20000)
+    args = vars(parser.parse_args())
+    for rename in SEARCH_RENAMES:
+        QueryBuilder.add_search_rename(*rename)
+
+    query_builder = QueryBuilder('requests', Request)
+
+    def uncached_build():
+        for query_string in QUERIES:
+            QueryBuilder.query_cache.clear()
+            query_builder.build(query_string, ignore_case=True)
+
+    def cached_build():
+        for query_string in QUERIES:
+            query_builder.build(query_string, ignore_case=True)
+
+    uncached_time = measure(uncached_build, args['repeat']) / len(QUERIES)
+    cached_build()
+    cached_time = measure(cached_build, args['repeat']) / len(QUERIES)
+    print(f'Uncached build: {uncached_time:.1f}us per query')
+    print(f'Cached build: {cached_time:.1f}us per query')
+
+
+if __name__ == '__main__':
+    main()
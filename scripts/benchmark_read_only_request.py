@@ -0,0 +1,43 @@
+"""
+Script that compares building full and read-only Request objects from a
+large request document
+It does not need a database
+"""
+import sys
+import os
+import argparse
+# pylint: disable-next=wrong-import-position
+sys.path.append(os.path.abspath(os.path.pardir))
+from benchmark_documents import get_request_json, best_time
+from core.model.request import Request
+
+
+def main():
+    """
+    Construct requests with and without read_only and use them
+    """
+    parser = argparse.ArgumentParser(description='Benchmark read-only requests')
+    parser.add_argument('--runs', help='Number of runs in request', type=int, default=500)
+    parser.add_argument('--repeat', help='Number of repetitions', type=int, default=300)
+    args = vars(parser.parse_args())
+    request_json = get_request_json(runs=args['runs'])
+    repeat = args['repeat']
+    results = [
+        ('construct, full', lambda: Request(json_input=request_json)),
+        ('construct, read only', lambda: Request(json_input=request_json, read_only=True)),
+        ('construct + get_era, read only',
+         lambda: Request(json_input=request_json, read_only=True).get_era()),
+        ('construct + get_json, full', lambda: Request(json_input=request_json).get_json()),
+        ('construct + get_json, read only',
+         lambda: Request(json_input=request_json, read_only=True).get_json()),
+    ]
+    for name, function in results:
+        print(f'{name:35} {best_time(function, repeat) / 1000:.2f}ms')
+
+    full_json = Request(json_input=request_json).get_json()
+    if Request(json_input=request_json, read_only=True).get_json() != full_json:
+        print('Read-only request JSON differs!')
+
+
+if __name__ == '__main__':
+    main()
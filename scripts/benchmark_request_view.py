@@ -0,0 +1,56 @@
+"""
+Script that compares time and memory of building a request string from a
+full Request, a read-only Request and a RequestView
+It does not need a database
+"""
+import sys
+import os
+import gc
+import argparse
+import tracemalloc
+# pylint: disable-next=wrong-import-position
+sys.path.append(os.path.abspath(os.path.pardir))
+from benchmark_documents import get_request_json, best_time
+from core.model.request import Request
+from core.model.request_view import RequestView
+
+
+def get_memory(function, count=1000):
+    """
+    Return average memory in KiB that is held by objects made by the function
+    """
+    gc.collect()
+    tracemalloc.start()
+    objects = [function() for _ in range(count)]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return memory / count / 1024
+
+
+def main():
+    """
+    Get request string of the same request in different ways
+    """
+    parser = argparse.ArgumentParser(description='Benchmark request view')
+    parser.add_argument('--runs', help='Number of runs in request', type=int, default=500)
+    parser.add_argument('--repeat', help='Number of repetitions', type=int, default=2000)
+    args = vars(parser.parse_args())
+    request_json = get_request_json(runs=args['runs'])
+    projected = {k: v for k, v in request_json.items() if k in RequestView.projection}
+    results = [
+        ('Request', lambda: Request(json_input=request_json)),
+        ('Request read only, unchecked',
+         lambda: Request(json_input=request_json, read_only=True, check_attributes=False)),
+        ('RequestView', lambda: RequestView(projected)),
+    ]
+    if len({make().get_request_string() for _, make in results}) != 1:
+        print('Request strings differ!')
+
+    for name, make in results:
+        time_us = best_time(lambda make=make: make().get_request_string(), args['repeat'])
+        print(f'{name:30} {time_us:.1f}us, {get_memory(make):.2f}KiB')
+
+
+if __name__ == '__main__':
+    main()
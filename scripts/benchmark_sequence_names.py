@@ -0,0 +1,36 @@
+"""
+Script that measures getting names, config file names and prepids of all
+sequences of a request
+It does not need a database
+"""
+import sys
+import os
+import argparse
+# pylint: disable-next=wrong-import-position
+sys.path.append(os.path.abspath(os.path.pardir))
+from benchmark_documents import get_request_json, best_time
+from core.model.request import Request
+
+
+def main():
+    """
+    Get sequence names of requests with different numbers of sequences
+    """
+    parser = argparse.ArgumentParser(description='Benchmark sequence names')
+    parser.add_argument('--repeat', help='Number of repetitions', type=int, default=1000)
+    args = vars(parser.parse_args())
+    for sequences in (2, 5, 10):
+        request = Request(json_input=get_request_json(runs=1, sequences=sequences),
+                          check_attributes=False)
+
+        def get_names(request=request):
+            for sequence in request.get('sequences'):
+                sequence.get_name()
+                sequence.get_config_file_names()
+                sequence.get_prepid()
+
+        print(f'{sequences:2} sequences: {best_time(get_names, args["repeat"]):.1f}us per request')
+
+
+if __name__ == '__main__':
+    main()
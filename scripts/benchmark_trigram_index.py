@@ -0,0 +1,196 @@
+"""
+Script that compares wildcard search with plain regex query and with query
+narrowed down by trigram index
+It uses the real database, search terms must be rebuilt before running it
+With --in_memory it compares regex scan of made up values with index lookup
+without a database, results on one core with Python 3.11:
+    100000 values, index build 2.8s
+    *ZeroBias*NANOAOD*: regex 89ms, index 11ms, 2381 results
+    *JetHT3*Run2019*MINIAOD: regex 96ms, index 0.2ms, 46 results
+Database comparison was not run yet
+"""
+import sys
+import os
+import re
+import time
+import argparse
+import pprint
+# pylint: disable-next=wrong-import-position
+sys.path.append(os.path.abspath(os.path.pardir))
+from core_lib.database.database import Database
+from core.model.request import Request
+from core.model.ticket import Ticket
+from core.utils.query_builder import QueryBuilder, SEARCH_RENAMES
+from core.utils.trigram_index import TrigramIndex
+
+
+def get_database_credentials() -> dict[str, str | int]:
+    """
+    Retrieves database credentials from environment variables
+    and raises a runtime exception if any of them is missing
+
+    Returns:
+        dict[str, str | int]: Configuration variables for database
+
+    Raises:
+        RuntimeError: If some of the required configuration variables for the
+            database is missing.
+    """
+    error_msg: str = (
+        "Some required environment variables for the database are missing. \n"
+        "Please set them, they are: \n"
+    )
+    missing_variables: list[str] = []
+    database_variables: dict[str, str | int] = {
+        "MONGO_DB_USERNAME": os.getenv("MONGO_DB_USERNAME", ""),
+        "MONGO_DB_PASSWORD": os.getenv("MONGO_DB_PASSWORD", ""),
+        "MONGO_DB_HOST": os.getenv("MONGO_DB_HOST", ""),
+        "MONGO_DB_PORT": int(os.getenv("MONGO_DB_PORT", "27017"))
+    }
+
+    for var, value in database_variables.items():
+        if not value:
+            missing_variables.append(var)
+
+    if missing_variables:
+        error_msg += pprint.pformat(missing_variables, indent=4)
+        raise RuntimeError(error_msg)
+
+    return database_variables
+
+
+def measure(function, repeat):
+    """
+    Return result of the function and average time of a call in milliseconds
+    """
+    result = function()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def get_dataset_names(count):
+    """
+    Return a list of made up output dataset names with prepids
+    """
+    datasets = ['ZeroBias', 'JetHT', 'SingleMuon', 'EGamma', 'MET', 'Tau', 'DoubleMuon']
+    tiers = ['AOD', 'MINIAOD', 'NANOAOD', 'DQMIO', 'USER', 'RAW-RECO']
+    names = []
+    for i in range(count):
+        name = (f'/{datasets[i % len(datasets)]}{i % 13}/Run20{16 + i % 8}'
+                f'{"ABCDEFGH"[i % 8]}-UL20{16 + i % 8}_v{i % 5}-{i}/{tiers[i % len(tiers)]}')
+        names.append((name, f'ReReco-Run20{16 + i % 8}-{i:06d}'))
+
+    return names
+
+
+def run_in_memory(query, count, repeat):
+    """
+    Compare regex scan of all values, like a database query does, with
+    lookup in trigram index that does not need a database
+    """
+    names = get_dataset_names(count)
+    index = TrigramIndex('requests')
+    start = time.perf_counter()
+    for name, prepid in names:
+        index.add_entry({'attribute': 'output_dataset',
+                         'value_lower': name.lower(),
+                         'prepid': prepid})
+
+    load_time = (time.perf_counter() - start) * 1000
+    index.loaded = True
+    index.complete = True
+    index.refreshed_at = time.time()
+    matcher = re.compile('^' + '.*'.join(re.escape(x) for x in query.split('*')) + '$',
+                         re.IGNORECASE)
+
+    def regex_search():
+        return sorted(prepid for name, prepid in names if matcher.match(name))
+
+    def index_search():
+        return sorted(index.find_prepids('output_dataset', query))
+
+    regex_results, regex_time = measure(regex_search, repeat)
+    index_results, index_time = measure(index_search, repeat)
+    print(f'{count} values, index build: {load_time:.1f}ms')
+    print(f'Regex scan: {regex_time:.2f}ms, {len(regex_results)} results')
+    print(f'Index lookup: {index_time:.2f}ms, {len(index_results)} results')
+    if regex_results != index_results:
+        print('Results differ!')
+
+
+def main():
+    """
+    Run the same wildcard search with and without trigram index
+    """
+    parser = argparse.ArgumentParser(description='Benchmark trigram index')
+    parser.add_argument('--db_name', help='Database name', default='requests')
+    parser.add_argument('--attribute', help='Searched attribute', default='output_datasets')
+    parser.add_argument('--query', help='Wildcard query', default='*ZeroBias*NANOAOD*')
+    parser.add_argument('--repeat', help='Number of repetitions', type=int, default=10)
+    parser.add_argument('--in_memory',
+                        help='Number of made up values to search without database',
+                        type=int,
+                        default=0)
+    args = vars(parser.parse_args())
+    if args['in_memory']:
+        run_in_memory(args['query'], args['in_memory'], args['repeat'])
+        return
+
+    database_credentials = get_database_credentials()
+
+    # Set database configuration
+    Database.set_host_port(
+        host=database_credentials["MONGO_DB_HOST"],
+        port=database_credentials["MONGO_DB_PORT"]
+    )
+    Database.set_credentials(
+        username=database_credentials["MONGO_DB_USERNAME"],
+        password=database_credentials["MONGO_DB_PASSWORD"]
+    )
+    Database.set_database_name('rereco')
+    for rename in SEARCH_RENAMES:
+        QueryBuilder.add_search_rename(*rename)
+
+    db_name = args['db_name']
+    attribute = args['attribute']
+    query_string = f'{attribute}={args["query"]}'
+    model_class = {'requests': Request, 'tickets': Ticket}[db_name]
+    collection = Database(db_name).collection
+    query_builder = QueryBuilder(db_name, model_class)
+
+    def regex_search():
+        query = query_builder.build(query_string, ignore_case=True)
+        return sorted(x['prepid'] for x in collection.find(query, {'prepid': 1}))
+
+    index = TrigramIndex(db_name)
+    start = time.perf_counter()
+    index.load()
+    load_time = (time.perf_counter() - start) * 1000
+    if not index.is_usable():
+        print('Trigram index cannot be used, search terms are not complete')
+        return
+
+    def index_search():
+        candidates = index.find_prepids(attribute, args['query'])
+        query = query_builder.build(query_string, ignore_case=True)
+        if candidates is not None:
+            query['$and'].append({'prepid': {'$in': sorted(candidates)}})
+
+        return sorted(x['prepid'] for x in collection.find(query, {'prepid': 1}))
+
+    regex_results, regex_time = measure(regex_search, args['repeat'])
+    index_results, index_time = measure(index_search, args['repeat'])
+    candidates = index.find_prepids(attribute, args['query'])
+    print(f'Index load: {load_time:.1f}ms')
+    print(f'Regex query: {regex_time:.2f}ms, {len(regex_results)} results')
+    print(f'Index + query: {index_time:.2f}ms, {len(index_results)} results, '
+          f'{"no" if candidates is None else len(candidates)} candidates')
+    if regex_results != index_results:
+        print('Results differ!')
+
+
+if __name__ == '__main__':
+    main()
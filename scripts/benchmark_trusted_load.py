@@ -0,0 +1,58 @@
+"""
+Script that compares loading requests with and without attribute checks,
+the way controllers load objects from the database
+It does not need a database
+"""
+import sys
+import os
+import time
+import argparse
+# pylint: disable-next=wrong-import-position
+sys.path.append(os.path.abspath(os.path.pardir))
+from benchmark_documents import get_request_json
+from core.model.request import Request
+
+
+def measure(function):
+    """
+    Return best time of three calls in seconds
+    """
+    times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+    """
+    Load many small requests with checked and trusted attributes
+    """
+    parser = argparse.ArgumentParser(description='Benchmark trusted loads')
+    parser.add_argument('--requests', help='Number of requests', type=int, default=10000)
+    parser.add_argument('--runs', help='Number of runs in request', type=int, default=20)
+    args = vars(parser.parse_args())
+    documents = [get_request_json(runs=args['runs'], number=i)
+                 for i in range(args['requests'])]
+    results = [
+        ('read only + sequences, checked',
+         lambda: [Request(json_input=d, read_only=True).get('sequences') for d in documents]),
+        ('read only + sequences, trusted',
+         lambda: [Request(json_input=d, read_only=True, check_attributes=False).get('sequences')
+                  for d in documents]),
+        ('from_database, read only + sequences',
+         lambda: [Request.from_database(d, read_only=True).get('sequences') for d in documents]),
+        ('full copy, checked',
+         lambda: [Request(json_input=d) for d in documents]),
+        ('full copy, trusted',
+         lambda: [Request(json_input=d, check_attributes=False) for d in documents]),
+    ]
+    print(f'{len(documents)} requests with {args["runs"]} runs')
+    for name, function in results:
+        print(f'{name:35} {measure(function):.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Script that checks and creates indexes of attributes that are used in search
+Without --create it only reports missing and unused indexes
+Web server creates missing indexes in the background when it starts
+"""
+import sys
+import os
+import argparse
+import pprint
+# pylint: disable-next=wrong-import-position
+sys.path.append(os.path.abspath(os.path.pardir))
+from core_lib.database.database import Database
+from core.utils.index_manager import IndexManager
+from core.utils.query_builder import QueryBuilder, SEARCH_RENAMES
+
+
+def get_database_credentials() -> dict[str, str | int]:
+    """
+    Retrieves database credentials from environment variables
+    and raises a runtime exception if any of them is missing
+
+    Returns:
+        dict[str, str | int]: Configuration variables for database
+    
+    Raises:
+        RuntimeError: If some of the required configuration variables for the
+            database is missing.
+    """
+    error_msg: str = (
+        "Some required environment variables for the database are missing. \n"
+        "Please set them, they are: \n"
+    )
+    missing_variables: list[str] = []
+    database_variables: dict[str, str | int] = {
+        "MONGO_DB_USERNAME": os.getenv("MONGO_DB_USERNAME", ""),
+        "MONGO_DB_PASSWORD": os.getenv("MONGO_DB_PASSWORD", ""),
+        "MONGO_DB_HOST": os.getenv("MONGO_DB_HOST", ""),
+        "MONGO_DB_PORT": int(os.getenv("MONGO_DB_PORT", "27017"))
+    }
+
+    for var, value in database_variables.items():
+        if not value:
+            missing_variables.append(var)
+
+    if missing_variables:
+        error_msg += pprint.pformat(missing_variables, indent=4)
+        raise RuntimeError(error_msg)
+
+    return database_variables
+
+
+def main():
+    """
+    Check indexes of given collections
+    """
+    parser = argparse.ArgumentParser(description='Check and create search indexes')
+    parser.add_argument('--collections',
+                        help='Comma separated list of collections to check',
+                        default='subcampaigns,tickets,requests,search_terms')
+    parser.add_argument('--create',
+                        help='Create missing indexes',
+                        action='store_true')
+    args = vars(parser.parse_args())
+    database_credentials = get_database_credentials()
+    collections = [x.strip() for x in args['collections'].split(',') if x.strip()]
+
+    # Set database configuration
+    Database.set_host_port(
+        host=database_credentials["MONGO_DB_HOST"],
+        port=database_credentials["MONGO_DB_PORT"]
+    )
+    Database.set_credentials(
+        username=database_credentials["MONGO_DB_USERNAME"],
+        password=database_credentials["MONGO_DB_PASSWORD"]
+    )
+    Database.set_database_name('rereco')
+    for rename in SEARCH_RENAMES:
+        QueryBuilder.add_search_rename(*rename)
+
+    reports = IndexManager().check_all(collections, args['create'])
+    pprint.pprint(reports)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Script that rebuilds "search_terms" collection used by wild search
+It should be run once after deployment and whenever search terms get out of sync
+"""
+import sys
+import os
+import argparse
+import pprint
+# pylint: disable-next=wrong-import-position
+sys.path.append(os.path.abspath(os.path.pardir))
+from core_lib.database.database import Database
+from core.utils.search_terms import SearchTerms
+
+
+def get_database_credentials() -> dict[str, str | int]:
+    """
+    Retrieves database credentials from environment variables
+    and raises a runtime exception if any of them is missing
+
+    Returns:
+        dict[str, str | int]: Configuration variables for database
+    
+    Raises:
+        RuntimeError: If some of the required configuration variables for the
+            database is missing.
+    """
+    error_msg: str = (
+        "Some required environment variables for the database are missing. \n"
+        "Please set them, they are: \n"
+    )
+    missing_variables: list[str] = []
+    database_variables: dict[str, str | int] = {
+        "MONGO_DB_USERNAME": os.getenv("MONGO_DB_USERNAME", ""),
+        "MONGO_DB_PASSWORD": os.getenv("MONGO_DB_PASSWORD", ""),
+        "MONGO_DB_HOST": os.getenv("MONGO_DB_HOST", ""),
+        "MONGO_DB_PORT": int(os.getenv("MONGO_DB_PORT", "27017"))
+    }
+
+    for var, value in database_variables.items():
+        if not value:
+            missing_variables.append(var)
+
+    if missing_variables:
+        error_msg += pprint.pformat(missing_variables, indent=4)
+        raise RuntimeError(error_msg)
+
+    return database_variables
+
+
+def main():
+    """
+    Rebuild search terms of given collections
+    """
+    parser = argparse.ArgumentParser(description='Rebuild wild search terms')
+    parser.add_argument('--collections',
+                        help='Comma separated list of collections to rebuild',
+                        default='subcampaigns,tickets,requests')
+    args = vars(parser.parse_args())
+    database_credentials = get_database_credentials()
+    collections = [x.strip() for x in args['collections'].split(',') if x.strip()]
+
+    # Set database configuration
+    Database.set_host_port(
+        host=database_credentials["MONGO_DB_HOST"],
+        port=database_credentials["MONGO_DB_PORT"]
+    )
+    Database.set_credentials(
+        username=database_credentials["MONGO_DB_USERNAME"],
+        password=database_credentials["MONGO_DB_PASSWORD"]
+    )
+    Database.set_database_name('rereco')
+    SearchTerms().rebuild(collections)
+    print('Done')
+
+
+if __name__ == '__main__':
+    main()
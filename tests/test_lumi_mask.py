@@ -0,0 +1,47 @@
+"""
+Tests of LumiMask
+"""
+import unittest
+from core.utils.lumi_mask import LumiMask
+
+
+class LumiMaskTest(unittest.TestCase):
+    """
+    Tests of building, converting and subsetting lumisection masks
+    """
+
+    def test_from_json(self):
+        """
+        Ranges are sorted and merged, runs without ranges are dropped
+        """
+        mask = LumiMask.from_json({'3': [[10, 20], [1, 5], [6, 8], [15, 30]],
+                                   '1': [[1, 1]],
+                                   '2': []})
+        self.assertEqual(mask.to_json(), {'1': [[1, 1]], '3': [[1, 8], [10, 30]]})
+        self.assertEqual(mask.get_runs(), [1, 3])
+        self.assertEqual(len(mask), 2)
+        self.assertEqual(mask.get_lumisection_count(), 1 + 8 + 21)
+
+    def test_contains(self):
+        """
+        Runs can be checked as numbers or strings
+        """
+        mask = LumiMask.from_json({'355100': [[1, 2]], '355102': [[1, 2]]})
+        self.assertIn(355100, mask)
+        self.assertIn('355102', mask)
+        self.assertNotIn(355101, mask)
+        self.assertNotIn(355103, mask)
+        self.assertNotIn(1, LumiMask())
+
+    def test_subset(self):
+        """
+        Subset keeps only given runs that are in the mask
+        """
+        mask = LumiMask.from_json({'1': [[1, 2]], '2': [[3, 4], [6, 7]], '4': [[5, 5]]})
+        subset = mask.subset(['4', 2, 3])
+        self.assertEqual(subset.to_json(), {'2': [[3, 4], [6, 7]], '4': [[5, 5]]})
+        self.assertEqual(mask.subset([]).to_json(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Tests of PrepidIndex
+"""
+import unittest
+from core.utils.prepid_index import PrepidIndex
+
+
+class PrepidIndexTest(unittest.TestCase):
+    """
+    Tests of prepid suggestions
+    """
+
+    def setUp(self):
+        self.index = PrepidIndex('requests')
+        for prepid in ('ReReco-Run2022C-ZeroBias-PromptNanoAODv10-00001',
+                       'ReReco-Run2022C-JetMET-PromptNanoAODv10-00002',
+                       'ReReco-Run2022D-ZeroBias-PromptNanoAODv10-00003',
+                       'ReReco-Run2023A-ZeroBias-27Jun2023-00004'):
+            self.index.add(prepid)
+
+    def test_fragments_in_order(self):
+        """
+        All fragments must be found in the same order
+        """
+        self.assertEqual(self.index.suggest('2022c zerobias'),
+                         ['ReReco-Run2022C-ZeroBias-PromptNanoAODv10-00001'])
+        self.assertEqual(self.index.suggest('zerobias 2022c'), [])
+
+    def test_asterisk_and_limit(self):
+        """
+        Asterisks separate fragments and results are sorted and limited
+        """
+        self.assertEqual(self.index.suggest('run2022*nanoaod', limit=2),
+                         ['ReReco-Run2022C-JetMET-PromptNanoAODv10-00002',
+                          'ReReco-Run2022C-ZeroBias-PromptNanoAODv10-00001'])
+
+    def test_short_query(self):
+        """
+        Queries shorter than an n-gram walk the sorted list
+        """
+        self.assertEqual(len(self.index.suggest('re')), 4)
+        self.assertEqual(self.index.suggest('  '), [])
+
+    def test_remove(self):
+        """
+        Removed prepids are not suggested
+        """
+        self.index.remove('ReReco-Run2023A-ZeroBias-27Jun2023-00004')
+        self.assertEqual(self.index.suggest('2023a'), [])
+        self.assertNotIn('rereco-run2023a-zerobias-27jun2023-00004', self.index.sorted_prepids)
+
+    def test_changes_during_reload(self):
+        """
+        Changes made while index is reloading are replayed after the reload
+        """
+        self.index.changes = []
+        self.index.add('ReReco-Run2024B-ZeroBias-PromptReco-00005')
+        self.index.remove('ReReco-Run2023A-ZeroBias-27Jun2023-00004')
+        self.assertEqual(len(self.index.changes), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
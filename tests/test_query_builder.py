@@ -0,0 +1,138 @@
+"""
+Tests of QueryBuilder
+"""
+import unittest
+from core.utils.query_builder import QueryBuilder
+
+
+class Model():
+    """
+    Model with a small schema
+    """
+
+    @staticmethod
+    def schema():
+        """
+        Return schema of the model
+        """
+        return {'prepid': '',
+                'priority': 0,
+                'history': [],
+                'time_per_event': [],
+                'runs': []}
+
+
+class QueryBuilderTest(unittest.TestCase):
+    """
+    Tests of search filters
+    """
+
+    def test_values(self):
+        """
+        Types come from the schema, comma separated values are alternatives
+        """
+        query_builder = QueryBuilder('requests', Model)
+        self.assertEqual(query_builder.build_part('priority', '5'), {'priority': 5})
+        self.assertEqual(query_builder.build_part('prepid', 'a,b', ignore_case=False),
+                         {'prepid': {'$in': ['a', 'b']}})
+        regex = query_builder.build_part('prepid', 'a*b')['prepid']
+        self.assertTrue(regex.match('AxxB'))
+        self.assertFalse(regex.match('xAB'))
+
+    def test_ranges(self):
+        """
+        Ranges of list attributes must be matched by a single element
+        """
+        query_builder = QueryBuilder('requests', Model)
+        self.assertEqual(query_builder.build_part('priority', '5..'),
+                         {'priority': {'$gte': 5}})
+        self.assertEqual(query_builder.build_part('runs<int>', '1..2'),
+                         {'runs': {'$elemMatch': {'$gte': 1, '$lte': 2}}})
+        self.assertRaises(ValueError, query_builder.build_part, 'priority', '..')
+
+    def test_prefix(self):
+        """
+        Prefixes are ranges unless case must be ignored
+        """
+        self.assertEqual(QueryBuilder.get_prefix('ReReco-*'), 'ReReco-')
+        self.assertIsNone(QueryBuilder.get_prefix('*ReReco'))
+        self.assertIsNone(QueryBuilder.get_prefix('Re*Reco*'))
+        self.assertEqual(QueryBuilder.prefix_range('abc'), {'$gte': 'abc', '$lt': 'abd'})
+        query_builder = QueryBuilder('requests', Model)
+        self.assertEqual(query_builder.build_part('prepid', 'Re*', ignore_case=False),
+                         {'prepid': {'$gte': 'Re', '$lt': 'Rf'}})
+        self.assertEqual(query_builder.build_part('prepid', '2022*'),
+                         {'prepid': {'$gte': '2022', '$lt': '2023'}})
+        self.assertNotIn('$gte', query_builder.build_part('prepid', 'Re*'))
+
+    def test_cache(self):
+        """
+        Extending a built filter does not change the cached one
+        """
+        query_builder = QueryBuilder('requests', Model)
+        query = query_builder.build('prepid=a&&priority=1', ignore_case=False)
+        self.assertEqual(query, {'$and': [{'deleted': {'$ne': True}},
+                                          {'prepid': 'a'},
+                                          {'priority': 1}]})
+        query['$and'].append({'status': 'new'})
+        query = query_builder.build('prepid=a&&priority=1', ignore_case=False)
+        self.assertEqual(len(query['$and']), 3)
+
+    def test_rename(self):
+        """
+        Renames are applied and clear the cache
+        """
+        query_builder = QueryBuilder('renamed', Model)
+        self.assertEqual(query_builder.build('run=1', ignore_case=False)['$and'][1], {'run': '1'})
+        QueryBuilder.add_search_rename('renamed', 'run', 'runs<int>')
+        self.assertEqual(query_builder.build('run=1', ignore_case=False)['$and'][1], {'runs': 1})
+        self.assertEqual(query_builder.build_sort('run', False), [('runs', -1), ('_id', -1)])
+
+
+class QueryBuilderSeekTest(unittest.TestCase):
+    """
+    Tests of keyset pagination filters
+    """
+
+    def test_multikey(self):
+        """
+        Lists are multikey, positional paths are not
+        """
+        query_builder = QueryBuilder('requests', Model)
+        self.assertTrue(query_builder.is_multikey('time_per_event'))
+        self.assertTrue(query_builder.is_multikey('history.time'))
+        self.assertFalse(query_builder.is_multikey('history.0.time'))
+        self.assertFalse(query_builder.is_multikey('priority'))
+
+    def test_seek_ascending(self):
+        """
+        Ascending seek selects larger values or same value and larger id
+        """
+        sort_keys = [('priority', 1), ('_id', 1)]
+        self.assertEqual(QueryBuilder.build_seek(sort_keys, [5, 'b']),
+                         {'$or': [{'priority': {'$gt': 5}},
+                                  {'priority': 5, '_id': {'$gt': 'b'}}]})
+
+    def test_seek_ascending_null(self):
+        """
+        Nulls come first in ascending order
+        """
+        sort_keys = [('priority', 1), ('_id', 1)]
+        self.assertEqual(QueryBuilder.build_seek(sort_keys, [None, 'b']),
+                         {'$or': [{'priority': {'$ne': None}},
+                                  {'priority': None, '_id': {'$gt': 'b'}}]})
+
+    def test_seek_descending(self):
+        """
+        Nulls come last in descending order
+        """
+        sort_keys = [('priority', -1), ('_id', -1)]
+        self.assertEqual(QueryBuilder.build_seek(sort_keys, [5, 'b']),
+                         {'$or': [{'$or': [{'priority': {'$lt': 5}}, {'priority': None}]},
+                                  {'priority': 5, '_id': {'$lt': 'b'}}]})
+        self.assertEqual(QueryBuilder.build_seek(sort_keys, [None, 'b']),
+                         {'priority': None, '_id': {'$lt': 'b'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
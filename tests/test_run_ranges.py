@@ -0,0 +1,42 @@
+"""
+Tests of RunRanges
+"""
+import unittest
+from core.utils.run_ranges import RunRanges
+
+
+class RunRangesTest(unittest.TestCase):
+    """
+    Tests of parsing, compressing and expanding run ranges
+    """
+
+    def test_parse(self):
+        """
+        Runs, pairs and strings are merged into a sorted list
+        """
+        self.assertEqual(RunRanges.parse([5, '1-3', [2, 4], '7..8', '6']),
+                         [1, 2, 3, 4, 5, 6, 7, 8])
+        self.assertEqual(RunRanges.parse([]), [])
+
+    def test_parse_bad_ranges(self):
+        """
+        Reversed and too big ranges are rejected
+        """
+        self.assertRaises(ValueError, RunRanges.parse, ['5-1'])
+        self.assertRaises(ValueError, RunRanges.parse, ['1-2000000000'])
+        self.assertRaises(ValueError, RunRanges.parse, ['x'])
+        many = [[i * 1000, i * 1000 + 999] for i in range(RunRanges.max_runs // 1000)]
+        self.assertEqual(len(RunRanges.parse(many)), RunRanges.max_runs)
+        self.assertRaises(ValueError, RunRanges.parse, many + [[-5, -5]])
+
+    def test_compress_expand(self):
+        """
+        Consecutive runs become ranges and back
+        """
+        runs = [1, 2, 3, 5, 7, 8]
+        self.assertEqual(RunRanges.compress(runs + [2]), [[1, 3], [5, 5], [7, 8]])
+        self.assertEqual(RunRanges.expand(RunRanges.compress(runs)), runs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Tests of TrigramIndex
+"""
+import time
+import unittest
+from core.utils.trigram_index import TrigramIndex
+
+
+class TrigramIndexTest(unittest.TestCase):
+    """
+    Tests of value and prepid lookups
+    """
+
+    def setUp(self):
+        self.index = TrigramIndex('requests')
+        for value, prepid in (('/ZeroBias/Run2022C-PromptNanoAODv10-v1/NANOAOD', 'ReReco-1'),
+                              ('/ZeroBias/Run2022C-PromptNanoAODv10-v1/DQMIO', 'ReReco-1'),
+                              ('/JetMET/Run2022C-PromptNanoAODv10-v1/NANOAOD', 'ReReco-2'),
+                              ('/ZeroBias/Run2023A-27Jun2023-v1/NANOAOD', 'ReReco-3')):
+            self.index.add_entry({'attribute': 'output_dataset',
+                                  'value_lower': value.lower(),
+                                  'prepid': prepid})
+
+        self.index.loaded = True
+        self.index.complete = True
+        self.index.refreshed_at = time.time()
+
+    def test_find_values(self):
+        """
+        Values must match the whole query and are sorted and limited
+        """
+        self.assertEqual(self.index.find_values('output_dataset', '*zerobias*nanoaod*'),
+                         ['/zerobias/run2022c-promptnanoaodv10-v1/dqmio',
+                          '/zerobias/run2022c-promptnanoaodv10-v1/nanoaod',
+                          '/zerobias/run2023a-27jun2023-v1/nanoaod'])
+        self.assertEqual(self.index.find_values('output_dataset', '*zerobias*nanoaod'),
+                         ['/zerobias/run2022c-promptnanoaodv10-v1/nanoaod',
+                          '/zerobias/run2023a-27jun2023-v1/nanoaod'])
+        self.assertEqual(self.index.find_values('output_datasets', '*2022c*', limit=1),
+                         ['/jetmet/run2022c-promptnanoaodv10-v1/nanoaod'])
+
+    def test_find_prepids(self):
+        """
+        Prepids of all matching values are returned
+        """
+        self.assertEqual(self.index.find_prepids('output_dataset', '*run2022c*'),
+                         {'ReReco-1', 'ReReco-2'})
+        self.assertEqual(self.index.find_prepids('output_dataset', '*jetmet*,*2023a*'),
+                         {'ReReco-2', 'ReReco-3'})
+
+    def test_not_usable(self):
+        """
+        Index is not used for short fragments, other attributes or stale index
+        """
+        self.assertIsNone(self.index.find_values('output_dataset', '*ze*'))
+        self.assertIsNone(self.index.find_values('prepid', '*rereco*'))
+        self.index.refreshed_at = 0
+        self.assertIsNone(self.index.find_values('output_dataset', '*zerobias*'))
+        self.assertIsNone(self.index.find_prepids('output_dataset', '*zerobias*'))
+
+
+if __name__ == '__main__':
+    unittest.main()